@@ -0,0 +1,66 @@
+"""
+Guards the application's start time: imports the entry points in a fresh interpreter with
+`-X importtime` and fails if a heavy dependency is loaded at import time or if an import takes
+longer than its budget.
+
+pandas, numpy, pypdf and openpyxl must only be loaded on first use (see src.startup.lazy_import).
+
+Usage:
+    python -m benchmarks.import_time [budget_ms]
+"""
+import subprocess
+import sys
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = ("src.gui.main", "src.cli", "src.excel_generation.excel_db")
+
+HEAVY_MODULES = ("pandas", "numpy", "pypdf", "openpyxl", "pyarrow")
+
+# Cumulative import time allowed for each entry point, in milliseconds
+DEFAULT_BUDGET_MS = 300
+
+
+def import_times(module: str) -> dict[str, float]:
+    """
+    Imports a module in a fresh interpreter and returns the cumulative import time, in milliseconds,
+    of every module it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def main(budget_ms: float = DEFAULT_BUDGET_MS) -> int:
+    failures = []
+    for module in ENTRY_POINTS:
+        # The first import compiles bytecode; time the second one
+        import_times(module)
+        times = import_times(module)
+        heavy = [name for name in HEAVY_MODULES if name in times]
+        print(f"{module:<32} {times[module]:8.1f} ms")
+        if heavy:
+            failures.append(f"{module} loads {', '.join(heavy)} at import time")
+        if times[module] > budget_ms:
+            failures.append(f"{module} takes {times[module]:.1f} ms (budget {budget_ms} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(float(arg) for arg in sys.argv[1:2])))
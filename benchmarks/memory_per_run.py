@@ -0,0 +1,47 @@
+"""
+Measures the memory retained by each parsed ASFT run.
+
+Every sample pdf is loaded and its report, results, configuration and derived measurements are
+evaluated. The parsed runs (pdf reader excluded) are then deep-copied under tracemalloc, so the
+reported size covers exactly what a run keeps alive, without tracing the pdf parsing itself.
+
+Usage:
+    python -m benchmarks.memory_per_run [folder] [copies]
+"""
+import copy
+import gc
+import sys
+import tracemalloc
+
+from pathlib import Path
+from src.pdf_processing.ASFT_Data import ASFT_Data
+
+SAMPLE_FOLDER = Path(__file__).resolve().parent.parent / "sample"
+
+
+def retained_bytes_per_run(folder: Path = SAMPLE_FOLDER, copies: int = 20) -> float:
+    runs = []
+    for file_path in sorted(folder.glob("*.pdf")):
+        data = ASFT_Data(file_path)
+        data.friction_measurement_report
+        data.result_summary
+        data.configuration
+        data.measurements
+        # The reader is only needed while extracting; drop it so only the parsed run is measured
+        data._reader = None
+        runs.append(data)
+
+    gc.collect()
+    tracemalloc.start()
+    copied_runs = [copy.deepcopy(data) for data in runs for _ in range(copies)]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return retained / len(copied_runs)
+
+
+if __name__ == "__main__":
+    folder = Path(sys.argv[1]) if len(sys.argv) > 1 else SAMPLE_FOLDER
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{retained_bytes_per_run(folder, copies) / 1024:.1f} KiB per run")
@@ -0,0 +1,259 @@
+"""
+Benchmark suite of the ingestion pipeline, on synthetic ASFT reports (see benchmarks.synthetic).
+
+Each benchmark runs at 1x, 10x and 100x scale, where 1x is one 2100 m run (about 210 rows) for the
+extractors and tables, and one folder of six runs for the end-to-end ingestion. The best of several
+timings and the peak memory traced by tracemalloc are reported and compared with the baselines
+stored in benchmarks/baselines.json. Timings depend on the machine, so save new baselines before
+comparing a change on another one. The 100x end-to-end run takes a few minutes with memory tracing.
+
+Usage:
+    python -m benchmarks.suite                      # run and compare with the baselines
+    python -m benchmarks.suite --scales 1x 10x      # skip the slowest scale
+    python -m benchmarks.suite --only chainage      # benchmarks whose name contains "chainage"
+    python -m benchmarks.suite --save               # store the results as the new baselines
+    python -m benchmarks.suite --check              # exit with status 1 on a regression
+"""
+import argparse
+import gc
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+from typing import Callable, Optional
+from benchmarks.synthetic import SyntheticReport, generate_folder, in_memory_asft, reports
+
+BASELINES_FILE = Path(__file__).resolve().parent / "baselines.json"
+
+SCALES = {"1x": 1, "10x": 10, "100x": 100}
+
+RUNWAY_LENGTH = 2100
+
+# A benchmark is slower than its baseline when it takes more than (1 + TOLERANCE) times as long
+TOLERANCE = 0.25
+
+
+class Benchmark:
+    """
+    A function timed at every scale.
+
+    Args:
+        name (str): Name of the benchmark.
+        setup (Callable[[int, Path], Callable[[], object]]): Called with the scale factor and a scratch
+            directory; returns the function to time. Setup is never timed.
+        repeat (int, optional): Timings taken; the fastest is kept. Defaults to 5.
+    """
+
+    def __init__(
+        self, name: str, setup: Callable[[int, Path], Callable[[], object]], repeat: int = 5
+    ) -> None:
+        self.name = name
+        self.setup = setup
+        self.repeat = repeat
+
+    def run(self, factor: int, scratch: Path, memory: bool = True) -> dict:
+        seconds = []
+        for _ in range(self.repeat):
+            function = self.setup(factor, scratch)
+            gc.collect()
+            start = time.perf_counter()
+            function()
+            seconds.append(time.perf_counter() - start)
+
+        result = {"seconds": min(seconds)}
+        if memory:
+            function = self.setup(factor, scratch)
+            gc.collect()
+            tracemalloc.start()
+            function()
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return result
+
+
+def _runway_report(factor: int) -> SyntheticReport:
+    return SyntheticReport(runway_length=RUNWAY_LENGTH * factor)
+
+
+def _setup_measurements_extractor(factor: int, scratch: Path):
+    data = in_memory_asft(_runway_report(factor))
+    return data._measurements_extractor
+
+
+def _setup_report_extractor(factor: int, scratch: Path):
+    objects = [in_memory_asft(report) for report in reports(factor, RUNWAY_LENGTH)]
+    return lambda: [data._report_extractor() for data in objects]
+
+
+def _setup_header_scan(factor: int, scratch: Path):
+    from src.excel_generation.excel_db import _information_table, group_of
+
+    objects = [in_memory_asft(report) for report in reports(factor, RUNWAY_LENGTH)]
+    for data in objects:
+        data.runway_length = RUNWAY_LENGTH
+        data.runway_starting_position = 0
+    # Everything a run needs from the report page: its group and its "Información" row
+    return lambda: [(group_of(data), _information_table(data)) for data in objects]
+
+
+def _setup_color_assignment(factor: int, scratch: Path):
+    data = in_memory_asft(_runway_report(factor))
+    averages = data.measurements["Av. Friction 100m"]
+    return lambda: data._color_assignment(averages)
+
+
+def _setup_measurements_with_chainage(factor: int, scratch: Path):
+    data = in_memory_asft(_runway_report(factor))
+    data.runway_length = RUNWAY_LENGTH * factor
+    data.runway_starting_position = 0
+    data.measurements
+    return lambda: data.measurements_with_chainage
+
+
+def _setup_append_dataframe_to_excel(factor: int, scratch: Path):
+    from src.excel_generation.excel_db import _measurements_table
+    from src.excel_generation.functions.excel_operations import append_dataframe_to_excel
+
+    data = in_memory_asft(_runway_report(factor))
+    data.runway_length = RUNWAY_LENGTH * factor
+    data.runway_starting_position = 0
+    table = _measurements_table(data)
+    excel_file = scratch / "append.xlsx"
+    excel_file.unlink(missing_ok=True)
+    return lambda: append_dataframe_to_excel(table, excel_file, "Mediciones")
+
+
+def _setup_create_measurement_file(factor: int, scratch: Path):
+    from src.excel_generation.excel_db import create_measurement_file
+
+    folder = scratch / f"pdf-{factor}x"
+    if not folder.exists():
+        generate_folder(folder, 6 * factor, RUNWAY_LENGTH)
+    target = scratch / "out"
+    shutil.rmtree(target, ignore_errors=True)
+    target.mkdir()
+
+    return lambda: create_measurement_file(
+        folder, target, RUNWAY_LENGTH, 0, RUNWAY_LENGTH, "", 0, 0, 0, ""
+    )
+
+
+def _setup_segment_history_query(factor: int, scratch: Path):
+    import datetime
+
+    import pandas as pd
+
+    from src.excel_generation.excel_db import _information_table, _measurements_table
+    from src.storage.history import SegmentHistory, segment_rows
+
+    history_file = scratch / f"history-{factor}x.sqlite"
+    if not history_file.exists():
+        # 50 campaigns of four lanes per scale factor, every one on another date
+        data = in_memory_asft(_runway_report(1))
+        data.runway_length = RUNWAY_LENGTH
+        data.runway_starting_position = 0
+        measurements = _measurements_table(data)
+        information = _information_table(data)
+        rows = segment_rows(measurements, information)
+        lanes = (("L", "borde"), ("L", "3m"), ("R", "3m"), ("R", "borde"))
+        campaigns = [
+            rows.assign(
+                **{
+                    "lado absoluto": side,
+                    "separación": separation,
+                    "fecha": datetime.date(2000, 1, 1) + datetime.timedelta(campaign),
+                    "id_1": f"{campaign}{side}{separation}",
+                }
+            )
+            for campaign in range(50 * factor)
+            for side, separation in lanes
+        ]
+        with SegmentHistory(history_file) as history:
+            history.write(pd.concat(campaigns, ignore_index=True))
+
+    history = SegmentHistory(history_file)
+    keys = history.connection.execute("SELECT iata, pista FROM tramos LIMIT 1").fetchone()
+    return lambda: history.query(*keys, "L", "3m", chainage=1050)
+
+
+BENCHMARKS = [
+    Benchmark("_measurements_extractor", _setup_measurements_extractor),
+    Benchmark("_report_extractor", _setup_report_extractor),
+    Benchmark("header_scan", _setup_header_scan),
+    Benchmark("_color_assignment", _setup_color_assignment),
+    Benchmark("measurements_with_chainage", _setup_measurements_with_chainage),
+    Benchmark("append_dataframe_to_excel", _setup_append_dataframe_to_excel, repeat=3),
+    Benchmark("create_measurement_file", _setup_create_measurement_file, repeat=1),
+    Benchmark("segment_history.query", _setup_segment_history_query),
+]
+
+
+def load_baselines(file_path: Path = BASELINES_FILE) -> dict:
+    if not file_path.exists():
+        return {}
+    return json.loads(file_path.read_text(encoding="utf-8"))
+
+
+def compare(result: dict, baseline: Optional[dict], tolerance: float = TOLERANCE) -> str:
+    """
+    Describes a result relative to its baseline, e.g. "0.82x" or "1.40x SLOWER".
+    """
+    if not baseline:
+        return "no baseline"
+    ratio = result["seconds"] / baseline["seconds"]
+    status = f"{ratio:.2f}x"
+    if ratio > 1 + tolerance:
+        status += " SLOWER"
+    if "peak_bytes" in result and baseline.get("peak_bytes"):
+        memory_ratio = result["peak_bytes"] / baseline["peak_bytes"]
+        if memory_ratio > 1 + tolerance:
+            status += f" MEMORY {memory_ratio:.2f}x"
+    return status
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this text.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs.")
+    parser.add_argument("--save", action="store_true", help="Store the results as baselines.")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<28} {'scale':>5} {'seconds':>10} {'peak MiB':>9}  vs. baseline")
+    with tempfile.TemporaryDirectory() as scratch:
+        for benchmark in BENCHMARKS:
+            if args.only and args.only not in benchmark.name:
+                continue
+            for scale in args.scales:
+                key = f"{benchmark.name}@{scale}"
+                result = benchmark.run(SCALES[scale], Path(scratch), not args.no_memory)
+                results[key] = result
+                status = compare(result, baselines.get(key), args.tolerance)
+                if "SLOWER" in status or "MEMORY" in status:
+                    regressions.append(key)
+                peak = (
+                    f"{result['peak_bytes'] / 1024**2:9.2f}" if "peak_bytes" in result else " " * 9
+                )
+                print(f"{benchmark.name:<28} {scale:>5} {result['seconds']:10.4f} {peak}  {status}")
+
+    if args.save:
+        baselines.update(results)
+        BASELINES_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines saved to {BASELINES_FILE}")
+
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
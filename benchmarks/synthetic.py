@@ -0,0 +1,271 @@
+"""
+Generator of synthetic ASFT friction measurement reports, for benchmarks.
+
+Reports can be produced as the page texts pypdf extracts from a real report (to benchmark the
+extractors without any pdf parsing), as ASFT_Data objects reading those texts from memory, or as
+actual .pdf files laid out like the ASFT ones (to benchmark the whole ingestion). Runway length,
+rows per page and number of files are arbitrary; values are random but reproducible from a seed.
+
+Usage:
+    python -m benchmarks.synthetic folder [files] [runway_length]
+"""
+import random
+import sys
+
+from dataclasses import dataclass
+from pathlib import Path
+from src.pdf_processing.ASFT_Data import ASFT_Data
+
+FOOTER = "ASFT industries AB © 1992-2014 All rights reserved"
+
+# Rows on the first measurements page, below the graph, and on each following page
+FIRST_PAGE_ROWS = 5
+ROWS_PER_PAGE = 30
+
+# (side, separation, minutes after the first run) of the runs measured on a runway, as in sample/
+RUNS = [("L", 3, 0), ("R", 3, 7), ("R", 5, 14), ("L", 5, 21), ("L", 3, 28), ("R", 3, 35)]
+
+
+@dataclass
+class SyntheticReport:
+    """
+    A synthetic ASFT run.
+
+    Attributes:
+        iata (str): Airport code.
+        numbering (int): Runway header the run starts from (01-36).
+        side (str): Relative side, "L" or "R".
+        separation (int): Distance to the runway axis in meters (5 is the edge, "borde").
+        runway_length (int): Runway length in meters; the run measures every 10 meters along it.
+        date (str): Date as YYMMDD.
+        time (str): Time as HHMMSS.
+        seed (int): Seed of the random measurement values.
+    """
+
+    iata: str = "SYN"
+    numbering: int = 13
+    side: str = "L"
+    separation: int = 3
+    runway_length: int = 2100
+    date: str = "240228"
+    time: str = "103726"
+    seed: int = 0
+
+    @property
+    def configuration(self) -> str:
+        return f"{self.iata} RWY{self.numbering:02d} {self.side}{self.separation}"
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.configuration}_{self.date}_{self.time}.pdf"
+
+    def rows(self) -> list[tuple[int, float, int]]:
+        """
+        (distance, friction, speed) of every measured point, every 10 meters, with occasional low
+        friction stretches so every color code appears.
+        """
+        rng = random.Random(self.seed)
+        rows = []
+        low = 0
+        for distance in range(10, self.runway_length + 1, 10):
+            if low == 0 and rng.random() < 0.01:
+                low = rng.randint(5, 25)
+            if low:
+                low -= 1
+                friction = rng.uniform(0.35, 0.62)
+            else:
+                friction = rng.uniform(0.55, 0.95)
+            rows.append((distance, round(friction, 2), rng.randint(58, 69)))
+        return rows
+
+    def results(self) -> list[str]:
+        friction = [row[1] for row in self.rows()]
+        third = max(len(friction) // 3, 1)
+        values = [
+            sum(friction[:third]) / third,
+            sum(friction[third : 2 * third]) / third,
+            sum(friction[2 * third :]) / max(len(friction) - 2 * third, 1),
+            max(friction),
+            min(friction),
+            sum(friction) / len(friction),
+        ]
+        return [f"{value:.2f}" for value in values]
+
+    def report_page_text(self) -> str:
+        date = f"{self.date[:2]}-{self.date[2:4]}-{self.date[4:]}"
+        time = f"{self.time[:2]}:{self.time[2:4]}:{self.time[4:]}"
+        a, b, c, maximum, minimum, average = self.results()
+        return "\n".join(
+            [
+                "Friction Measure Report",
+                f"Configuration {self.configuration} Tyre Type ASTM",
+                f"Date and Time {date} {time} Tyre Pressure 2.1 ",
+                "Type ICAO Water Film ON",
+                "Equipment SFT0161 Average Speed 65",
+                f"Pilot SUPER System Distance {self.runway_length + 98}",
+                "Ice Level 0",
+                f"Runway Length {self.runway_length}",
+                "Location ASFT",
+                "Results",
+                "RunwayFric. AFric. BFric. CFric.MaxFric.MinFric avgT. surfaceT. airIce",
+                f"RWY01{a}µ{b}µ{c}µ{maximum}µ{minimum}µ{average}µ----0.00%",
+                "Results Summary",
+                "RWFric. AFric. BFric. CFric.MaxFric.MinT. surfaceT. airIceFric AVG",
+                f"all{a}µ{b}µ{c}µ{maximum}µ{minimum}µ----0.00%{average}µ",
+                FOOTER,
+                "",
+            ]
+        )
+
+    def page_texts(self, rows_per_page: int = ROWS_PER_PAGE) -> list[str]:
+        """
+        The text of every page, as pypdf extracts it from an ASFT report.
+        """
+        rows = [f"{d}{f:.2f}{s}----" for d, f, s in self.rows()]
+        pages = [self.report_page_text()]
+        header = [
+            "Graphs",
+            "Measure No 1",
+            "RW1Lap1",
+            "DistanceFrictionSpeedTmp Air °CTmp Gnd ",
+            "°CRemark",
+        ]
+        pages.append("\n".join(header + rows[:FIRST_PAGE_ROWS] + [FOOTER, ""]))
+        for start in range(FIRST_PAGE_ROWS, len(rows), rows_per_page):
+            pages.append("\n".join(rows[start : start + rows_per_page] + [FOOTER, ""]))
+        return pages
+
+
+class _TextPage:
+    """Stands in for a pypdf page whose text is already known."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def get_contents(self):
+        return self.text or None
+
+    def extract_text(self) -> str:
+        return self.text
+
+
+class _TextReader:
+    """Stands in for a PdfReader over in-memory page texts."""
+
+    def __init__(self, texts: list[str]) -> None:
+        self.pages = [_TextPage(text) for text in texts]
+
+
+def in_memory_asft(report: SyntheticReport, rows_per_page: int = ROWS_PER_PAGE) -> ASFT_Data:
+    """
+    Returns an ASFT_Data object that reads the report's page texts from memory instead of a pdf.
+    The texts are pypdf's, so the object uses the pypdf text backend.
+    """
+    data = ASFT_Data(Path(report.file_name), text_backend="pypdf")
+    data._reader = _TextReader(report.page_texts(rows_per_page))
+    return data
+
+
+def _pdf_string(text: str) -> bytes:
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("cp1252") + b")"
+
+
+def write_pdf(file_path: Path, page_texts: list[str]) -> None:
+    """
+    Writes a minimal pdf with one text line per line of each page, in a standard font, so that pypdf
+    extracts the same text back (but for the last line break).
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    font = 3
+    objects.append(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+
+    page_numbers = []
+    for text in page_texts:
+        lines = text.rstrip("\n").split("\n")
+        content = b"".join(
+            b"BT /F1 9 Tf 40 %d Td %s Tj ET\n" % (800 - 12 * index, _pdf_string(line))
+            for index, line in enumerate(lines)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        contents = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font, contents)
+        )
+        page_numbers.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_numbers))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    Path(file_path).write_bytes(bytes(output))
+
+
+def reports(
+    files: int, runway_length: int = 2100, iata: str = "SYN", seed: int = 0
+) -> list[SyntheticReport]:
+    """
+    Returns `files` synthetic runs: six runs per runway header and date, as in sample/, on as many
+    dates as needed.
+    """
+    result = []
+    for index in range(files):
+        day, run = divmod(index, len(RUNS))
+        side, separation, minutes = RUNS[run]
+        result.append(
+            SyntheticReport(
+                iata=iata,
+                numbering=13 if run < len(RUNS) // 2 else 31,
+                side=side,
+                separation=separation,
+                runway_length=runway_length,
+                date=f"24{1 + day // 28 % 12:02d}{1 + day % 28:02d}",
+                time=f"10{minutes:02d}{index % 60:02d}",
+                seed=seed + index,
+            )
+        )
+    return result
+
+
+def generate_folder(
+    directory: Path,
+    files: int,
+    runway_length: int = 2100,
+    rows_per_page: int = ROWS_PER_PAGE,
+    seed: int = 0,
+) -> list[Path]:
+    """
+    Writes `files` synthetic ASFT .pdf reports to a directory.
+
+    Returns:
+        list[Path]: The written files.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for report in reports(files, runway_length, seed=seed):
+        path = directory / report.file_name
+        write_pdf(path, report.page_texts(rows_per_page))
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    folder = Path(sys.argv[1])
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else len(RUNS)
+    runway_length = int(sys.argv[3]) if len(sys.argv) > 3 else 2100
+    print(f"{len(generate_folder(folder, files, runway_length))} files written to {folder}")
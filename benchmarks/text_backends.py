@@ -0,0 +1,71 @@
+"""
+Compares the text extraction backends (see src.pdf_processing.text_extraction) on real pdf files:
+the time to extract the measurement columns of each file with every backend, and whether the rows
+match pypdf's.
+
+Usage:
+    python -m benchmarks.text_backends [folder ...]      # defaults to sample/ and synthetic files
+"""
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+from benchmarks.synthetic import generate_folder
+from src.pdf_processing.ASFT_Data import ASFT_Data
+from src.pdf_processing.pdf_management import iter_pdf_files
+from src.pdf_processing.text_extraction import TEXT_BACKENDS
+
+SAMPLE_FOLDER = Path(__file__).resolve().parent.parent / "sample"
+
+REPEAT = 5
+
+
+def time_backend(file_path: Path, backend: str, repeat: int = REPEAT) -> tuple[float, list]:
+    """
+    Returns the fastest time, in seconds, to open a file and extract its measurement columns with a
+    backend, and the extracted rows.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with ASFT_Data(file_path, text_backend=backend) as data:
+            columns = data._measurements_extractor()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds), columns.to_frame().values.tolist()
+
+
+def main(folders: list[Path]) -> int:
+    mismatches = 0
+    totals = dict.fromkeys(TEXT_BACKENDS, 0.0)
+    print(f"{'file':<40}" + "".join(f"{backend:>16}" for backend in TEXT_BACKENDS) + "  rows")
+    for file_path in (path for folder in folders for path in iter_pdf_files(folder)):
+        results = {backend: time_backend(file_path, backend) for backend in TEXT_BACKENDS}
+        expected = results["pypdf"][1]
+        same = all(rows == expected for _, rows in results.values())
+        mismatches += not same
+        for backend, (seconds, _) in results.items():
+            totals[backend] += seconds
+        print(
+            f"{file_path.name[:40]:<40}"
+            + "".join(f"{seconds * 1000:13.1f} ms" for seconds, _ in results.values())
+            + f"  {len(expected)}{'' if same else ' MISMATCH'}"
+        )
+
+    print(
+        f"{'total':<40}" + "".join(f"{seconds * 1000:13.1f} ms" for seconds in totals.values())
+    )
+    for backend in TEXT_BACKENDS:
+        if backend != "pypdf" and totals[backend]:
+            print(f"{backend}: {totals['pypdf'] / totals[backend]:.1f}x faster than pypdf")
+    if mismatches:
+        print(f"{mismatches} files whose rows differ from pypdf's")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main([Path(arg) for arg in sys.argv[1:]]))
+    with tempfile.TemporaryDirectory() as scratch:
+        generate_folder(Path(scratch), 6)
+        sys.exit(main([SAMPLE_FOLDER, Path(scratch)]))
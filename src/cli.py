@@ -0,0 +1,422 @@
+"""
+Headless batch entry point: processes folders of ASFT .pdf files without the GUI.
+
+Examples:
+    python -m src.cli pdf/AEP/2024-02-28 --target out --runway-length 2100 --start-0118 0 --start-1936 2100
+    python -m src.cli --job jobs/aep.toml
+
+A job file (JSON or TOML) holds the options shared by every run, plus one entry per folder with its
+own runway length and starting positions:
+
+    target_directory = "out"
+    workers = 4
+
+    [defaults]
+    operator = "Operador"
+
+    [[runs]]
+    folder = "pdf/AEP/2024-02-28"
+    runway_length = 2100
+    runway_starting_position_0118 = 0
+    runway_starting_position_1936 = 2100
+
+The files of a folder are split by airport, runway and date, each group into its own workbook, and
+groups are processed concurrently. Settings can also be given per runway, or per runway and date,
+overriding those of the runs:
+
+    [[groups]]
+    iata = "AEP"
+    runway = "13-31"
+    date = "2024-02-28"  # optional
+    runway_length = 2100
+
+A JSON summary of what was written, skipped or failed is printed to stdout; warnings go to stderr.
+The exit status is 0 on success, 1 if any file failed and 2 if a run could not complete.
+
+--watch keeps polling the folders and ingests new files as they finish copying (see src.watch);
+stop it with Ctrl+C. One JSON summary line is printed per ingested batch.
+
+--columnar also appends every run to a Parquet store (the layout of --storage parquet), which Power BI
+loads much faster than the workbooks and which has no row limit.
+
+--history also summarizes every committed run per runway segment in a SegmentHistory (see
+src.storage.history): asft_historial.sqlite in the target directory, next to the --store, or the
+given file. No history is kept without it.
+
+--metrics writes per-file, per-stage timings as JSON lines (see src.instrumentation), and --profile
+runs the whole batch under cProfile or tracemalloc.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import sys
+
+from pathlib import Path
+from typing import Optional
+
+RUN_FIELDS = (
+    "runway_length",
+    "runway_starting_position_0118",
+    "runway_starting_position_1936",
+    "operator",
+    "ambient_temperature",
+    "surface_temperature",
+    "humidity",
+    "observations",
+)
+
+OPTION_FIELDS = (
+    "target_directory",
+    "workers",
+    "cache_directory",
+    "recursive",
+    "chunk_size",
+    "storage",
+    "store",
+    "text_backend",
+    "columnar_directory",
+    "history_file",
+    "group_workers",
+    "watch",
+    "interval",
+    "settle_seconds",
+    "state_file",
+    "metrics",
+    "profile",
+    "profile_output",
+)
+
+REQUIRED_FIELDS = (
+    "target_directory",
+    "runway_length",
+    "runway_starting_position_0118",
+    "runway_starting_position_1936",
+)
+
+
+def _parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Process folders of ASFT friction measurement reports without the GUI.",
+    )
+    parser.add_argument("folders", nargs="*", type=Path, help="Folders of ASFT .pdf files.")
+    parser.add_argument("--job", type=Path, help="JSON or TOML job file.")
+    parser.add_argument("--target", dest="target_directory", type=Path)
+    parser.add_argument("--runway-length", dest="runway_length", type=int)
+    parser.add_argument("--start-0118", dest="runway_starting_position_0118", type=int)
+    parser.add_argument("--start-1936", dest="runway_starting_position_1936", type=int)
+    parser.add_argument("--operator")
+    parser.add_argument("--ambient-temperature", dest="ambient_temperature", type=float)
+    parser.add_argument("--surface-temperature", dest="surface_temperature", type=float)
+    parser.add_argument("--humidity", type=float)
+    parser.add_argument("--observations")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument(
+        "--group-workers",
+        dest="group_workers",
+        type=int,
+        help="Airport, runway and date groups processed at the same time. Defaults to all of them.",
+    )
+    parser.add_argument("--cache", dest="cache_directory", type=Path)
+    parser.add_argument("--recursive", action="store_true", default=None)
+    parser.add_argument("--chunk-size", dest="chunk_size", type=int)
+    parser.add_argument("--storage", choices=["excel", "sqlite", "parquet"])
+    parser.add_argument(
+        "--store", type=Path, help="Database file or dataset directory for sqlite/parquet storage."
+    )
+    parser.add_argument(
+        "--text-backend",
+        dest="text_backend",
+        choices=["auto", "content-stream", "pypdf"],
+        help="Text extraction of the measurement pages. Defaults to pypdf.",
+    )
+    parser.add_argument(
+        "--columnar",
+        dest="columnar_directory",
+        type=Path,
+        help="Also append the rows to Parquet datasets in this folder, e.g. for Power BI (excel storage).",
+    )
+    parser.add_argument(
+        "--history",
+        dest="history_file",
+        nargs="?",
+        const=True,
+        type=Path,
+        help="Keep the per-segment history of the runs in this file. Defaults to the target folder or the store.",
+    )
+    parser.add_argument(
+        "--watch", action="store_true", default=None, help="Keep ingesting new files as they arrive."
+    )
+    parser.add_argument("--interval", type=float, help="Seconds between polls in watch mode.")
+    parser.add_argument(
+        "--settle",
+        dest="settle_seconds",
+        type=float,
+        help="Seconds a file must stay unchanged before it is ingested in watch mode.",
+    )
+    parser.add_argument(
+        "--state-file",
+        dest="state_file",
+        type=Path,
+        help="Processed files of watch mode. Defaults to asft_watch_state.json in the target directory.",
+    )
+    parser.add_argument(
+        "--metrics", help="JSON lines file for the per-stage timings, or - for stderr."
+    )
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"])
+    parser.add_argument(
+        "--profile-output",
+        dest="profile_output",
+        type=Path,
+        help="Profiler report file. Defaults to asft_profile.prof or asft_memory.txt.",
+    )
+    return parser.parse_args(argv)
+
+
+def _load_job(job_file: Path) -> dict:
+    if job_file.suffix.lower() == ".toml":
+        import tomllib
+
+        with open(job_file, "rb") as file:
+            return tomllib.load(file)
+    with open(job_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _group_settings(job: dict) -> dict[tuple, dict]:
+    """
+    Settings of the job's groups, keyed by (iata, runway) or (iata, runway, date).
+    """
+    group_settings = {}
+    for group in job.get("groups", []):
+        settings = {key: group[key] for key in RUN_FIELDS if key in group}
+        key = (group["iata"], group["runway"])
+        if "date" in group:
+            date = group["date"]
+            key += (date if isinstance(date, datetime.date) else datetime.date.fromisoformat(date),)
+        group_settings[key] = settings
+    return group_settings
+
+
+def _build_runs(args: argparse.Namespace) -> tuple[dict, list[dict]]:
+    """
+    Merges the job file and the command line into the shared options and one settings dict per run.
+    Command line values take precedence over the job file. The job's groups are returned in the
+    options, as "group_settings".
+    """
+    job = _load_job(args.job) if args.job else {}
+    given = {key: value for key, value in vars(args).items() if value is not None}
+
+    options = {key: job[key] for key in OPTION_FIELDS if key in job}
+    options.update({key: given[key] for key in OPTION_FIELDS if key in given})
+
+    defaults = dict(job.get("defaults", {}))
+    defaults.update({key: given[key] for key in RUN_FIELDS if key in given})
+
+    runs = [{**defaults, **run} for run in job.get("runs", [])]
+    runs += [{**defaults, "folder": folder} for folder in args.folders]
+
+    options["group_settings"] = _group_settings(job)
+    for run in runs:
+        missing = [
+            key
+            for key in REQUIRED_FIELDS
+            if key not in run
+            and key not in options
+            # Runway settings may be given for every group instead
+            and not (options["group_settings"] and key in RUN_FIELDS)
+        ]
+        if missing:
+            raise ValueError(f"Run {str(run.get('folder'))!r} is missing: {', '.join(missing)}.")
+    return options, runs
+
+
+def _open_storage(options: dict):
+    kind = options.get("storage", "excel")
+    if kind == "excel":
+        return None
+    if "store" not in options:
+        raise ValueError(f"--store is required with {kind} storage.")
+    if kind == "sqlite":
+        from src.storage.sqlite_backend import SQLiteBackend
+
+        return SQLiteBackend(options["store"])
+    from src.storage.parquet_backend import ParquetBackend
+
+    return ParquetBackend(options["store"])
+
+
+def _history_file(options: dict, target_directory: Path) -> Optional[Path]:
+    """
+    SegmentHistory file of the --history option: the given file, or if none was given
+    asft_historial.sqlite next to the sqlite/parquet store or in the target directory. None if the
+    option is not set.
+    """
+    history_file = options.get("history_file")
+    if history_file is None or history_file is False:
+        return None
+    if history_file is not True:
+        return Path(history_file)
+
+    from src.storage.history import HISTORY_FILE_NAME, SegmentHistory
+
+    if options.get("storage", "excel") != "excel":
+        return SegmentHistory.sidecar_path(options["store"])
+    return target_directory / HISTORY_FILE_NAME
+
+
+def _merge_summaries(summaries: dict) -> dict:
+    """
+    Combines the summaries of a run's groups into the run's entry of the report, listing what each
+    group wrote.
+    """
+    entry = {"outputs": [], "written": [], "skipped": [], "failed": [], "cancelled": False, "groups": []}
+    for group, summary in summaries.items():
+        for key in ("outputs", "written", "skipped", "failed"):
+            entry[key].extend(getattr(summary, key))
+        entry["cancelled"] = entry["cancelled"] or summary.cancelled
+        if group is not None:
+            entry["groups"].append(
+                {
+                    "iata": group.iata,
+                    "runway": group.runway,
+                    "date": group.date.isoformat(),
+                    "outputs": summary.outputs,
+                    "written": len(summary.written),
+                    "skipped": len(summary.skipped),
+                    "failed": len(summary.failed),
+                }
+            )
+    return entry
+
+
+def _watch(runs: list[dict], options: dict, storage) -> int:
+    from src.watch import POLL_INTERVAL, SETTLE_SECONDS, STATE_FILE_NAME, watch
+
+    watch_runs = []
+    for run in runs:
+        target_directory = Path(run.get("target_directory", options.get("target_directory")))
+        watch_runs.append(
+            {
+                "folder": Path(run["folder"]),
+                "target_directory": target_directory,
+                **{key: run.get(key) for key in RUN_FIELDS},
+            }
+        )
+
+    def on_batch(run: dict, summary) -> None:
+        print(json.dumps({"folder": str(run["folder"]), **summary.to_dict()}, ensure_ascii=False))
+        sys.stdout.flush()
+
+    state_file = options.get(
+        "state_file", watch_runs[0]["target_directory"] / STATE_FILE_NAME
+    )
+    Path(state_file).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        watch(
+            watch_runs,
+            state_file,
+            interval=options.get("interval", POLL_INTERVAL),
+            settle_seconds=options.get("settle_seconds", SETTLE_SECONDS),
+            recursive=bool(options.get("recursive", False)),
+            storage=storage,
+            group_settings=options["group_settings"],
+            on_batch=on_batch,
+            workers=options.get("workers", 1),
+            cache_directory=options.get("cache_directory"),
+            chunk_size=options.get("chunk_size"),
+            text_backend=options.get("text_backend", "pypdf"),
+            columnar_directory=options.get("columnar_directory"),
+            history_file=_history_file(options, watch_runs[0]["target_directory"]),
+            group_workers=options.get("group_workers"),
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = _parse_args(argv)
+    try:
+        options, runs = _build_runs(args)
+    except (OSError, ValueError) as e:
+        print(json.dumps({"error": str(e)}))
+        return 2
+    if not runs:
+        print(json.dumps({"error": "No folders given."}))
+        return 2
+
+    # Imported here so that argument errors are reported without loading pandas and pypdf
+    from src import instrumentation
+    from src.excel_generation.excel_db import create_measurement_files
+    from src.startup import init_locale
+
+    init_locale()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s", stream=sys.stderr)
+
+    profile = options.get("profile")
+    profile_output = options.get(
+        "profile_output",
+        "asft_profile.prof" if profile == "cprofile" else "asft_memory.txt",
+    )
+
+    report = {"runs": []}
+    exit_code = 0
+    storage = None
+    with contextlib.ExitStack() as stack:
+        if "metrics" in options:
+            metrics = options["metrics"]
+            hook = instrumentation.JsonLinesHook(sys.stderr if metrics == "-" else metrics)
+            stack.callback(hook.close)
+            stack.enter_context(instrumentation.hooked(hook))
+        try:
+            stack.enter_context(instrumentation.profiling(profile, profile_output))
+            storage = _open_storage(options)
+            if options.get("watch"):
+                return _watch(runs, options, storage)
+            for run in runs:
+                entry = {"folder": str(run["folder"])}
+                try:
+                    target_directory = Path(
+                        run.get("target_directory", options.get("target_directory"))
+                    )
+                    target_directory.mkdir(parents=True, exist_ok=True)
+                    summaries = create_measurement_files(
+                        Path(run["folder"]),
+                        target_directory,
+                        {key: run.get(key) for key in RUN_FIELDS},
+                        options["group_settings"],
+                        group_workers=options.get("group_workers"),
+                        recursive=bool(options.get("recursive", False)),
+                        workers=options.get("workers", 1),
+                        cache_directory=options.get("cache_directory"),
+                        storage=storage,
+                        chunk_size=options.get("chunk_size"),
+                        text_backend=options.get("text_backend", "pypdf"),
+                        columnar_directory=options.get("columnar_directory"),
+                        history_file=_history_file(options, target_directory),
+                    )
+                    entry.update(_merge_summaries(summaries))
+                    if entry["failed"]:
+                        exit_code = max(exit_code, 1)
+                except Exception as e:
+                    entry["error"] = str(e)
+                    exit_code = 2
+                report["runs"].append(entry)
+        except Exception as e:
+            report["error"] = str(e)
+            exit_code = 2
+        finally:
+            if storage is not None:
+                storage.close()
+
+    for outcome in ("written", "skipped", "failed"):
+        report[outcome] = sum(len(run.get(outcome, [])) for run in report["runs"])
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,90 +1,142 @@
+from __future__ import annotations
+
 from src.pdf_processing.ASFT_Data import ASFT_Data
-import pandas as pd
+from src.startup import lazy_import, preload
+from src.instrumentation import emit, stage
 from pathlib import Path
-from src.excel_generation.functions.excel_operations import append_dataframe_to_excel
-from src.pdf_processing.pdf_management import create_asft_objects
-import locale
+import datetime
+import itertools
+import logging
+import threading
+import time
+from src.excel_generation.functions.excel_operations import append_dataframes_to_excel
+from src.excel_generation.functions.table_batch import TableBatch, information_row
+from src.storage.base import DuplicateMeasurementError, StorageBackend
+from src.storage.excel_backend import ExcelBackend, open_columnar
+from src.storage.parquet_backend import ParquetBackend
+from src.storage.history import SegmentHistory
+from src.pdf_processing.pdf_management import iter_asft_objects, iter_pdf_files
+from src.pdf_processing.parse_cache import ParseCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Mapping, NamedTuple, Optional, Union
+from dataclasses import asdict, dataclass, field
 
-locale.setlocale(locale.LC_TIME, "es")
+pd = lazy_import("pandas")
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionSummary:
+    """
+    Outcome of a create_measurement_file run.
+
+    Attributes:
+        outputs (list[str]): Locations written to (workbook, database or dataset).
+        written (list[str]): Files whose measurements were stored.
+        skipped (list[dict]): Files not stored because they already were, with the reason.
+        failed (list[dict]): Files that could not be read or stored, with the error. Files whose batch
+            could not be committed have "stage": "commit".
+        cancelled (bool): Whether the run was cancelled before every file was processed.
+    """
+
+    outputs: list[str] = field(default_factory=list)
+    written: list[str] = field(default_factory=list)
+    skipped: list[dict] = field(default_factory=list)
+    failed: list[dict] = field(default_factory=list)
+    cancelled: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
 
-def _measurements_table(data: ASFT_Data) -> pd.DataFrame:
-    measurements = data.measurements_with_chainage
-    measurements_df = pd.DataFrame(
-        {
-            "id_1": data.id_1,
-            "progresiva": measurements["Chainage"],
-            "distancia": measurements["Distance"],
-            "fricción": measurements["Friction"],
-            "velocidad": measurements["Speed"],
-            "prom. fricción 100m": measurements["Av. Friction 100m"],
-            "criticidad": measurements["Color Code"],
-        }
-    )
 
-    return measurements_df
+def _run_tables(data: ASFT_Data) -> dict[str, pd.DataFrame]:
+    batch = TableBatch()
+    batch.append(data)
+    return batch.tables()
+
+
+def _measurements_table(data: ASFT_Data) -> pd.DataFrame:
+    return _run_tables(data)["Mediciones"]
 
 
 def _information_table(data: ASFT_Data) -> pd.DataFrame:
-    return pd.DataFrame(
-        {
-            "id_1": [data.id_1],
-            "id_2": [data.id_2],
-            "fecha": [data.friction_measurement_report.loc[0, "Date"]],
-            "horario": [data.friction_measurement_report.loc[0, "Time"]],
-            "iata": [data.configuration.loc[0, "iata"]],
-            "cabecera": [data.configuration.loc[0, "numbering"]],
-            "lado relativo": [data.configuration.loc[0, "relative side"]],
-            "lado absoluto": [data.configuration.loc[0, "absolute side"]],
-            "separación": [data.configuration.loc[0, "separation"]],
-            "pista": [data.configuration.loc[0, "runway"]],
-            "velocidad promedio": [
-                data.friction_measurement_report.loc[0, "Average Speed"]
-            ],
-            "fric_A": [data.result_summary.loc[0, "Fric. A"]],
-            "fric_B": [data.result_summary.loc[0, "Fric. B"]],
-            "fric_C": [data.result_summary.loc[0, "Fric. C"]],
-            "fric_max": [data.result_summary.loc[0, "Fric. Max"]],
-            "fric_min": [data.result_summary.loc[0, "Fric. Min"]],
-            "fric_prom": [data.result_summary.loc[0, "Fric. Avg"]],
-            "longitud de pista": [data.runway_length],
-            "inicio de medición": [data.runway_starting_position],
-            "equipo": [data.friction_measurement_report.loc[0, "Equipment"]],
-            "piloto": [data.friction_measurement_report.loc[0, "Pilot"]],
-            "nivel de hielo": [data.friction_measurement_report.loc[0, "Ice Level"]],
-            "presión de neumático": [
-                data.friction_measurement_report.loc[0, "Tyre Pressure"]
-            ],
-            "película de agua": [data.friction_measurement_report.loc[0, "Water Film"]],
-            "distancia sistema": [
-                data.friction_measurement_report.loc[0, "System Distance"]
-            ],
-            "operador": [data.operator],
-            "temperatura ambiente": [data.ambient_temperature],
-            "temperatura de pista": [data.surface_temperature],
-            "humedad": [data.humidity],
-            "observaciones": [data.observations],
-        }
-    )
+    return pd.DataFrame([information_row(data)])
+
+
+def _add_asft_data_to_db(data: ASFT_Data, storage: StorageBackend):
+    """
+    Queues the "Mediciones" and "Información" rows of a measurement in the storage backend, to be
+    assembled and written together with the rest of the run on commit.
+
+    Measurements whose id, or whose pdf content, is already stored or earlier in the run are rejected.
+    """
+    with stage("duplicate_check", data.filename):
+        storage.check_new(data.id_1, data.content_hash)
+    with stage("build_tables", data.filename) as counters:
+        storage.add(data, data.content_hash)
+        counters["rows"] = len(data.measurements_with_chainage)
+    with stage("heat_map", data.filename):
+        storage.add_to_heat_map(data)
+
 
+def export_to_excel(storage: StorageBackend, excel_file: Path) -> None:
+    """
+    Writes every measurement held by a storage backend to a new Excel workbook with the
+    "Mediciones" and "Información" sheets, e.g. as the Power BI source of an SQLite or Parquet store.
+    """
+    append_dataframes_to_excel(storage.read_tables(), excel_file)
 
-def _add_asft_data_to_db(data: ASFT_Data, excel_file: Path):
-    measurements = _measurements_table(data)
-    information = _information_table(data)
 
-    file_path = Path(excel_file)
-    if file_path.exists():
-        existing_information_table = pd.read_excel(excel_file, sheet_name="Información")
+def export_to_columnar(storage: StorageBackend, directory: Path) -> None:
+    """
+    Appends every measurement held by a storage backend (e.g. an existing workbook) to the Parquet store
+    of a folder, e.g. as a Power BI source. Runs already in that store are left out. Requires pyarrow.
+    """
+    with ParquetBackend(directory) as columnar:
+        columnar.append_tables(storage.read_tables())
 
-        if any(information["id_1"].isin(existing_information_table["id_1"])):
-            raise Exception("El id ya se encuentra en la base de datos.")
 
-    append_dataframe_to_excel(measurements, excel_file, "Mediciones")
-    append_dataframe_to_excel(information, excel_file, "Información")
+class MeasurementGroup(NamedTuple):
+    """
+    Measurements stored together: those of one airport, runway and date.
+
+    Attributes:
+        iata (str): Airport code, e.g. "AEP".
+        runway (str): Runway designation, e.g. "13-31".
+        date (datetime.date): Date of the measurements.
+    """
+
+    iata: str
+    runway: str
+    date: datetime.date
+
+    @property
+    def workbook_name(self) -> str:
+        return f"{self.iata}_RWY{self.runway}_{self.date}.xlsx"
+
+
+def group_of(measurement: ASFT_Data) -> MeasurementGroup:
+    """
+    Returns the group of a measurement. Only the report page of the pdf is read.
+    """
+    return MeasurementGroup(
+        measurement.configuration.iata,
+        measurement.configuration.runway,
+        measurement.friction_measurement_report.date,
+    )
+
+
+def workbook_path(measurement: ASFT_Data, target_directory: Path) -> Path:
+    """
+    Returns the path of the Excel workbook a measurement is stored in by default, named after its
+    airport, runway and date. Only the report page of the pdf is read.
+    """
+    return Path(target_directory) / group_of(measurement).workbook_name
 
 
 def create_measurement_file(
-    asft_measurements_folder: Path,
+    asft_measurements_folder: Union[Path, Iterable[Path]],
     target_directory: Path,
     runway_length: int,
     runway_starting_position_0118: int,
@@ -94,19 +146,137 @@ def create_measurement_file(
     surface_temperature: float,
     humidity: float,
     observations: str,
-) -> None:
-    measurements = create_asft_objects(asft_measurements_folder)
-    excel_file = None
+    workers: int = 1,
+    cache_directory: Optional[Union[str, Path]] = None,
+    storage: Optional[StorageBackend] = None,
+    recursive: bool = False,
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    text_backend: str = "pypdf",
+    history_file: Optional[Union[str, Path]] = None,
+    columnar_directory: Optional[Union[str, Path, ParquetBackend]] = None,
+) -> IngestionSummary:
+    """
+    Parses every ASFT .pdf file in a folder (or the given .pdf files) and appends its measurements to the
+    run's Excel workbook.
+
+    Files are streamed through parse, enrich and write stages: each pdf is opened only when its turn
+    comes and released once its rows are queued, so folders of thousands of files (including
+    subfolders, with `recursive`) are processed with bounded memory. Queued rows are committed every
+    `chunk_size` files, or once at the end of the run if it is None.
+
+    Parsing can be spread over `workers` processes; the storage is always written from this process,
+    in file name order. When `cache_directory` is given, extraction results are kept there and reused
+    for pdf files whose content has not changed.
+
+    By default each measurement is stored in the Excel workbook of its airport, runway and date, so a
+    mixed folder is split between several workbooks. The same run settings apply to every file; use
+    create_measurement_files to give each runway its own. Pass `storage` to append to another backend
+    (e.g. an SQLite or Parquet store) instead.
+
+    `progress` is called once per file with a dict holding "file", "status" ("agregado", "omitido" or
+    "error"), "message", "done" and "total", e.g. to update a progress bar. It is called from the thread
+    running this function. The same dict is emitted as a "file" instrumentation record, and files that
+    are skipped or fail are logged as warnings. If `cancel_event` (e.g. a threading.Event) is set, the run stops before the
+    next file; the files already processed are still committed.
+
+    `text_backend` selects how the text of the measurement pages is extracted: "pypdf" (the default),
+    the faster "content-stream" decoder, or "auto" (the decoder, checked against pypdf on a few pages
+    of every file).
+
+    With `history_file`, committed runs are also summarized per runway segment in the SegmentHistory
+    there. No history is kept by default.
+
+    With `columnar_directory`, the workbooks' runs are also appended to the Parquet store there (see
+    ParquetBackend). It only applies to the default Excel workbooks, not to a `storage`. Concurrent
+    calls writing the same store must share it: pass them the same ParquetBackend instead.
+
+    Returns:
+        IngestionSummary: The files written, skipped as duplicates, or failed.
+    """
+    started = time.perf_counter()
+    summary = IngestionSummary()
+    pending_files = []
+    file_paths = list(iter_pdf_files(asft_measurements_folder, recursive))
+    done = 0
+
+    def report(file_path: Path, status: str, message: str = "") -> None:
+        nonlocal done
+        done += 1
+        event = {
+            "file": str(file_path),
+            "status": status,
+            "message": message,
+            "done": done,
+            "total": len(file_paths),
+        }
+        emit("file", **event)
+        if progress is not None:
+            progress(event)
+
+    def parse_error(file_path: Path, e: Exception) -> None:
+        logger.warning("Error leyendo %s: %s", file_path.name, e)
+        summary.failed.append({"file": str(file_path), "error": str(e)})
+        report(file_path, "error", f"Error leyendo {file_path.name}: {e}")
+
+    # Without a storage, each measurement goes to the workbook of its airport, runway and date
+    workbooks: dict[Path, ExcelBackend] = {}
+    if storage is None:
+        # Every workbook appends to the same columnar store
+        columnar_directory = open_columnar(columnar_directory)
+
+    history = None if history_file is None else SegmentHistory(history_file)
+    if storage is not None and history is not None:
+        storage.history = history
+
+    def commit() -> None:
+        errors = {}
+        for backend in [storage] if storage is not None else workbooks.values():
+            try:
+                backend.commit()
+            except Exception as e:
+                # The backend discarded the batch: its files are stored on the next run
+                logger.warning("Error guardando %s: %s", backend.location.name, e)
+                errors[backend] = str(e)
+        for backend, file_path in pending_files:
+            if backend in errors:
+                summary.failed.append(
+                    {"file": file_path, "error": errors[backend], "stage": "commit"}
+                )
+            else:
+                summary.written.append(file_path)
+        pending_files.clear()
+
+    parse_cache = ParseCache(cache_directory) if cache_directory is not None else None
+    source = file_paths
+    if cancel_event is not None:
+        # Stop handing files to the parser as soon as the run is cancelled
+        source = itertools.takewhile(lambda _: not cancel_event.is_set(), file_paths)
+    measurements = iter_asft_objects(
+        source,
+        workers=workers,
+        parse_cache=parse_cache,
+        on_error=parse_error,
+        text_backend=text_backend,
+    )
 
     for index, measurement in enumerate(measurements):
-        if index == 0:
-            date = measurement.friction_measurement_report.loc[0, "Date"]
-            iata = measurement.configuration.loc[0, "iata"]
-            rwy = measurement.configuration.loc[0, "runway"]
-            file_name = f"{iata}_RWY{rwy}_{date}.xlsx"
-            excel_file = target_directory / file_name
-
-        numbering = int(measurement.configuration.loc[0, "numbering"])
+        if cancel_event is not None and cancel_event.is_set():
+            measurements.close()
+            break
+
+        backend = storage
+        if backend is None:
+            excel_file = workbook_path(measurement, target_directory)
+            if excel_file not in workbooks:
+                workbooks[excel_file] = ExcelBackend(excel_file, columnar_directory)
+                workbooks[excel_file].history = history
+            backend = workbooks[excel_file]
+        if str(backend.location) not in summary.outputs:
+            summary.outputs.append(str(backend.location))
+
+        numbering = int(measurement.configuration.numbering)
         measurement.runway_length = runway_length
         measurement.operator = operator
         measurement.ambient_temperature = ambient_temperature
@@ -120,6 +290,176 @@ def create_measurement_file(
             measurement.runway_starting_position = runway_starting_position_1936
 
         try:
-            _add_asft_data_to_db(measurement, excel_file)
+            _add_asft_data_to_db(measurement, backend)
+            pending_files.append((backend, str(measurement.file_path)))
+            report(measurement.file_path, "agregado")
+        except DuplicateMeasurementError as e:
+            logger.warning("Medición %s omitida: %s", measurement, e)
+            summary.skipped.append({"file": str(measurement.file_path), "reason": str(e)})
+            report(measurement.file_path, "omitido", str(e))
+        except Exception as e:
+            logger.warning("Error agregando %s a la base de datos: %s", measurement, e)
+            summary.failed.append({"file": str(measurement.file_path), "error": str(e)})
+            report(measurement.file_path, "error", str(e))
+
+        if chunk_size and (index + 1) % chunk_size == 0:
+            commit()
+
+    commit()
+    if history is not None:
+        if storage is not None:
+            storage.history = None
+        history.close()
+
+    summary.cancelled = done < len(file_paths)
+    emit(
+        "run",
+        folder=str(asft_measurements_folder),
+        seconds=round(time.perf_counter() - started, 6),
+        files=len(file_paths),
+        written=len(summary.written),
+        skipped=len(summary.skipped),
+        failed=len(summary.failed),
+        cancelled=summary.cancelled,
+    )
+    return summary
+
+
+def group_files(
+    source: Union[Path, Iterable[Path]],
+    recursive: bool = False,
+    cache_directory: Optional[Union[str, Path]] = None,
+    on_error: Optional[Callable[[Path, Exception], None]] = None,
+    text_backend: str = "pypdf",
+) -> dict[MeasurementGroup, list[Path]]:
+    """
+    Groups .pdf files by airport, runway and date, reading only their report pages (or the parse cache).
+
+    Args:
+        source (Union[Path, Iterable[Path]]): A folder, or the .pdf files to group.
+        recursive (bool, optional): Whether to search subfolders when source is a folder. Defaults to False.
+        cache_directory (Union[str, Path], optional): Parse cache consulted for files parsed before.
+        on_error (Callable[[Path, Exception], None], optional): Called with the file path and the exception
+            when a file's report page can't be read; the file is then left out. If not given, the
+            exception is raised.
+        text_backend (str, optional): Text backend of the run, whose parse cache entries are consulted.
+            Defaults to "pypdf".
+
+    Returns:
+        dict[MeasurementGroup, list[Path]]: The files of each group, in file order, with groups sorted.
+    """
+    parse_cache = ParseCache(cache_directory) if cache_directory is not None else None
+    groups: dict[MeasurementGroup, list[Path]] = {}
+    for file_path in iter_pdf_files(source, recursive):
+        try:
+            with ASFT_Data(file_path, parse_cache, text_backend) as data:
+                group = group_of(data)
         except Exception as e:
-            print(f"Error agregando {measurement} a la base de datos: {e}")
+            if on_error is None:
+                raise
+            on_error(file_path, e)
+            continue
+        groups.setdefault(group, []).append(file_path)
+    return dict(sorted(groups.items()))
+
+
+def _group_settings(group: MeasurementGroup, settings: dict, group_settings: Mapping) -> dict:
+    """
+    Run settings of a group: the defaults, updated with those given for its airport and runway, then
+    with those given for its airport, runway and date.
+    """
+    return {
+        **settings,
+        **group_settings.get((group.iata, group.runway), {}),
+        **group_settings.get(tuple(group), {}),
+    }
+
+
+def create_measurement_files(
+    asft_measurements_folder: Union[Path, Iterable[Path]],
+    target_directory: Path,
+    settings: dict,
+    group_settings: Optional[Mapping[tuple, dict]] = None,
+    group_workers: Optional[int] = None,
+    recursive: bool = False,
+    **options,
+) -> dict[Optional[MeasurementGroup], IngestionSummary]:
+    """
+    Splits a batch of ASFT .pdf files by airport, runway and date, and ingests each group into its own
+    Excel workbook (see create_measurement_file), with groups processed concurrently.
+
+    Runway lengths and starting positions usually differ between runways, so each group takes its
+    settings from `group_settings`, keyed by (iata, runway) or (iata, runway, date), over the defaults:
+
+        create_measurement_files(
+            folder,
+            target_directory,
+            settings={"operator": "Operador", "ambient_temperature": 20, ...},
+            group_settings={
+                ("AEP", "13-31"): {"runway_length": 2100, "runway_starting_position_0118": 0,
+                                   "runway_starting_position_1936": 2100},
+                ("EZE", "11-29"): {"runway_length": 3300, ...},
+            },
+        )
+
+    Args:
+        asft_measurements_folder (Union[Path, Iterable[Path]]): A folder, or the .pdf files to ingest.
+        target_directory (Path): Folder of the workbooks.
+        settings (dict): Default run settings: runway_length, runway_starting_position_0118,
+            runway_starting_position_1936, operator, ambient_temperature, surface_temperature, humidity
+            and observations.
+        group_settings (Mapping[tuple, dict], optional): Settings overriding the defaults for some groups.
+        group_workers (int, optional): Groups processed at the same time. Defaults to one per group, or to
+            one at a time when every group goes to the same `storage` option.
+        recursive (bool, optional): Whether to search subfolders. Defaults to False.
+        **options: Other arguments of create_measurement_file (workers, cache_directory, chunk_size,
+            text_backend, history_file, columnar_directory, progress, cancel_event). `progress` is
+            called from the groups' threads, or from this thread when groups run one at a time.
+
+    Returns:
+        dict[Optional[MeasurementGroup], IngestionSummary]: The summary of each group. Files whose report
+        page can't be read are listed as failed under the None key.
+    """
+    group_settings = group_settings or {}
+    unreadable = IngestionSummary()
+
+    def read_error(file_path: Path, e: Exception) -> None:
+        logger.warning("Error leyendo %s: %s", file_path.name, e)
+        unreadable.failed.append({"file": str(file_path), "error": str(e)})
+
+    groups = group_files(
+        asft_measurements_folder,
+        recursive,
+        options.get("cache_directory"),
+        on_error=read_error,
+        text_backend=options.get("text_backend", "pypdf"),
+    )
+
+    def ingest(group: MeasurementGroup) -> IngestionSummary:
+        return create_measurement_file(
+            groups[group],
+            target_directory,
+            **_group_settings(group, settings, group_settings),
+            **options,
+        )
+
+    summaries: dict[Optional[MeasurementGroup], IngestionSummary] = {}
+    if groups and options.get("storage") is None:
+        # Groups run concurrently, so they share the columnar store
+        options["columnar_directory"] = open_columnar(options.get("columnar_directory"))
+    if groups:
+        if options.get("storage") is not None:
+            # A storage backend queues and commits from a single thread
+            group_workers = 1
+        group_workers = group_workers or len(groups)
+        if group_workers == 1:
+            # In the caller's thread: backends such as SQLite can only be used from the thread that
+            # opened them
+            summaries.update((group, ingest(group)) for group in groups)
+        else:
+            preload("numpy", "pandas", "pypdf", "openpyxl")
+            with ThreadPoolExecutor(max_workers=group_workers) as executor:
+                summaries.update(zip(groups, executor.map(ingest, groups)))
+    if unreadable.failed:
+        summaries[None] = unreadable
+    return summaries
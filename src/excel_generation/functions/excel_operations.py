@@ -1,12 +1,17 @@
+from __future__ import annotations
+
 import os
-import pandas as pd
-from openpyxl import load_workbook, Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.worksheet.cell_range import CellRange
-from openpyxl.worksheet.table import Table
-from openpyxl.utils import column_index_from_string
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 from pathlib import Path
+from src.startup import lazy_import
+from src.instrumentation import stage
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+    from openpyxl.worksheet.worksheet import Worksheet
+
+openpyxl = lazy_import("openpyxl")
+pd = lazy_import("pandas")
 
 
 def append_dataframe_to_excel(
@@ -20,32 +25,93 @@ def append_dataframe_to_excel(
         excel_file (Union[str, Path]): The path to the Excel file where the DataFrame will be appended.
         sheet_name (str): The name of the sheet where the DataFrame should be appended.
 
+    Returns:
+        None
+    """
+    append_dataframes_to_excel({sheet_name: dataframe}, excel_file)
+
+
+def append_dataframes_to_excel(
+    dataframes: dict[str, pd.DataFrame],
+    excel_file: Union[str, Path],
+    replace: Optional[dict[str, pd.DataFrame]] = None,
+) -> None:
+    """
+    Appends several pandas DataFrames to an existing or new Excel file, one sheet per DataFrame,
+    opening and saving the workbook only once.
+
+    New workbooks are written in openpyxl's streaming write-only mode. The workbook is saved to a
+    temporary file next to the target and then renamed over it, so an error never leaves a
+    half-written file behind.
+
+    Args:
+        dataframes (dict[str, pd.DataFrame]): DataFrames to append, keyed by sheet name, in sheet order.
+        excel_file (Union[str, Path]): The path to the Excel file where the DataFrames will be appended.
+        replace (dict[str, pd.DataFrame], optional): DataFrames whose sheets are rewritten instead of
+            appended to, e.g. tables aggregated over the whole workbook. Defaults to None.
+
     Returns:
         None
     """
     file_path = Path(excel_file)
 
     if not file_path.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
-        ws.append(list(dataframe.columns))
-        for index, row in dataframe.iterrows():
-            row_list = list(row)
-            ws.append(row_list)
-        wb.save(excel_file)
-        return
+        wb = openpyxl.Workbook(write_only=True)
+        for sheet_name, dataframe in dataframes.items():
+            ws = wb.create_sheet(sheet_name)
+            ws.append(list(dataframe.columns))
+            _append_rows(ws, dataframe)
+        for sheet_name, dataframe in (replace or {}).items():
+            ws = wb.create_sheet(sheet_name)
+            ws.append(list(dataframe.columns))
+            _append_rows(ws, dataframe)
 
     else:
-        wb = load_workbook(file_path)
-        if sheet_name in wb:
-            ws = wb[sheet_name]
-        else:
-            ws = wb.create_sheet(sheet_name)
+        wb = openpyxl.load_workbook(file_path)
+        for sheet_name, dataframe in dataframes.items():
+            if sheet_name in wb:
+                ws = wb[sheet_name]
+            else:
+                ws = wb.create_sheet(sheet_name)
+                ws.append(list(dataframe.columns))
+            _append_rows(ws, dataframe)
+        for sheet_name, dataframe in (replace or {}).items():
+            index = None
+            if sheet_name in wb:
+                index = wb.sheetnames.index(sheet_name)
+                wb.remove(wb[sheet_name])
+            ws = wb.create_sheet(sheet_name, index)
             ws.append(list(dataframe.columns))
+            _append_rows(ws, dataframe)
+
+    _save_atomically(wb, file_path)
+
+
+def _append_rows(ws: Worksheet, dataframe: pd.DataFrame) -> None:
+    # openpyxl rejects pd.NA, the missing value of nullable columns (e.g. those read from Parquet)
+    nullable = [
+        column
+        for column, dtype in dataframe.dtypes.items()
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype)
+        and not isinstance(dtype, pd.CategoricalDtype)
+    ]
+    if nullable:
+        dataframe = dataframe.copy()
+        for column in nullable:
+            values = dataframe[column].astype(object)
+            dataframe[column] = values.where(values.notna(), None)
+    with stage("append_rows", ws.title, rows=len(dataframe)):
+        for row in dataframe.itertuples(index=False, name=None):
+            ws.append(row)
 
-    for index, row in dataframe.iterrows():
-        row_list = list(row)
-        ws.append(row_list)
 
-    wb.save(excel_file)
+def _save_atomically(wb: Workbook, file_path: Path) -> None:
+    temp_path = file_path.with_name(f"~{file_path.stem}.tmp{file_path.suffix}")
+    try:
+        with stage("save_workbook", file_path.name) as counters:
+            wb.save(temp_path)
+            counters["bytes"] = temp_path.stat().st_size
+            os.replace(temp_path, file_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
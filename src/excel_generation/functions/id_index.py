@@ -0,0 +1,118 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+from src.startup import lazy_import
+
+openpyxl = lazy_import("openpyxl")
+
+
+class IdIndex:
+    """
+    Set of the measurement ids (id_1) and pdf content hashes already stored in a workbook.
+
+    The index is kept in a small sidecar file next to the workbook ("<workbook>.ids.json"), so a run
+    does not have to parse the "Información" sheet to check for duplicates. If the workbook was
+    modified outside this program, the ids are re-read from the workbook.
+    """
+
+    def __init__(
+        self, ids: Optional[set[str]] = None, hashes: Optional[dict[str, str]] = None
+    ) -> None:
+        self.ids: set[str] = ids if ids is not None else set()
+        self.hashes: dict[str, str] = hashes if hashes is not None else {}
+
+    @staticmethod
+    def sidecar_path(excel_file: Union[str, Path]) -> Path:
+        excel_file = Path(excel_file)
+        return excel_file.with_name(f"{excel_file.name}.ids.json")
+
+    @staticmethod
+    def _workbook_signature(excel_file: Path) -> list:
+        stat = excel_file.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @classmethod
+    def load(
+        cls, excel_file: Union[str, Path], sheet_name: str = "Información"
+    ) -> "IdIndex":
+        """
+        Loads the index of a workbook, from its sidecar file if it is up to date.
+
+        Args:
+            excel_file (Union[str, Path]): The workbook. It doesn't need to exist yet.
+            sheet_name (str, optional): Sheet holding the id_1 column. Defaults to "Información".
+
+        Returns:
+            IdIndex: The ids and content hashes stored in the workbook.
+        """
+        excel_file = Path(excel_file)
+        if not excel_file.exists():
+            return cls()
+
+        sidecar = {}
+        sidecar_path = cls.sidecar_path(excel_file)
+        if sidecar_path.exists():
+            try:
+                sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+            except ValueError:
+                sidecar = {}
+
+        if sidecar.get("workbook") == cls._workbook_signature(excel_file):
+            return cls(set(sidecar["ids"]), dict(sidecar["hashes"]))
+
+        ids = cls._read_ids(excel_file, sheet_name)
+        hashes = {
+            digest: id_1
+            for digest, id_1 in sidecar.get("hashes", {}).items()
+            if id_1 in ids
+        }
+        return cls(ids, hashes)
+
+    @staticmethod
+    def _read_ids(excel_file: Path, sheet_name: str) -> set[str]:
+        wb = openpyxl.load_workbook(excel_file, read_only=True)
+        try:
+            if sheet_name not in wb:
+                return set()
+            rows = wb[sheet_name].iter_rows(values_only=True)
+            header = next(rows, ())
+            if "id_1" not in header:
+                return set()
+            column = header.index("id_1")
+            return {row[column] for row in rows if row[column] is not None}
+        finally:
+            wb.close()
+
+    def save(self, excel_file: Union[str, Path]) -> None:
+        """
+        Writes the sidecar file of a workbook. Call it right after the workbook is saved.
+        """
+        excel_file = Path(excel_file)
+        sidecar_path = self.sidecar_path(excel_file)
+        temp_path = sidecar_path.with_name(f"{sidecar_path.name}.tmp")
+        temp_path.write_text(
+            json.dumps(
+                {
+                    "workbook": self._workbook_signature(excel_file),
+                    "ids": sorted(self.ids),
+                    "hashes": self.hashes,
+                }
+            ),
+            encoding="utf-8",
+        )
+        os.replace(temp_path, sidecar_path)
+
+    def __contains__(self, id_1: str) -> bool:
+        return id_1 in self.ids
+
+    def id_for_hash(self, digest: str) -> Optional[str]:
+        """
+        Returns the id stored for a pdf content hash, or None if that content was never stored.
+        """
+        return self.hashes.get(digest)
+
+    def add(self, id_1: str, digest: Optional[str] = None) -> None:
+        self.ids.add(id_1)
+        if digest is not None:
+            self.hashes[digest] = id_1
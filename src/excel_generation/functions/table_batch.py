@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from src.startup import lazy_import
+from src.pdf_processing.criticality import COLOR_LABELS
+
+if TYPE_CHECKING:
+    from src.pdf_processing.ASFT_Data import ASFT_Data
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# "Mediciones" columns copied from ASFT_Data.measurements_with_chainage: (source column, dtype)
+MEASUREMENT_COLUMNS = {
+    "progresiva": ("Chainage", "int64"),
+    "distancia": ("Distance", "int64"),
+    "fricción": ("Friction", "float64"),
+    "velocidad": ("Speed", "int64"),
+    "prom. fricción 100m": ("Av. Friction 100m", "float64"),
+}
+
+
+def information_row(data: ASFT_Data) -> dict:
+    """
+    Returns the "Información" values of a measurement, keyed by column.
+    """
+    report = data.friction_measurement_report
+    results = data.result_summary
+    configuration = data.configuration
+    return {
+        "id_1": data.id_1,
+        "id_2": data.id_2,
+        "fecha": report.date,
+        "horario": report.time,
+        "iata": configuration.iata,
+        "cabecera": configuration.numbering,
+        "lado relativo": configuration.relative_side,
+        "lado absoluto": configuration.absolute_side,
+        "separación": configuration.separation,
+        "pista": configuration.runway,
+        "velocidad promedio": report.average_speed,
+        "fric_A": results.fric_a,
+        "fric_B": results.fric_b,
+        "fric_C": results.fric_c,
+        "fric_max": results.fric_max,
+        "fric_min": results.fric_min,
+        "fric_prom": results.fric_avg,
+        "longitud de pista": data.runway_length,
+        "inicio de medición": data.runway_starting_position,
+        "equipo": report.equipment,
+        "piloto": report.pilot,
+        "nivel de hielo": report.ice_level,
+        "presión de neumático": report.tyre_pressure,
+        "película de agua": report.water_film,
+        "distancia sistema": report.system_distance,
+        "operador": data.operator,
+        "temperatura ambiente": data.ambient_temperature,
+        "temperatura de pista": data.surface_temperature,
+        "humedad": data.humidity,
+        "observaciones": data.observations,
+    }
+
+
+class TableBatch:
+    """
+    Collects the "Mediciones" and "Información" rows of the measurements of a run, and assembles them
+    into one table per sheet.
+
+    Appending a measurement only keeps references to its aligned measurement arrays and its
+    information values; `tables` then copies every array once into preallocated columns. id_1 and
+    criticidad are categorical, so each row stores a small code instead of a string.
+    """
+
+    def __init__(self) -> None:
+        self._ids: list[str] = []
+        self._lengths: list[int] = []
+        self._arrays: dict[str, list[np.ndarray]] = {column: [] for column in MEASUREMENT_COLUMNS}
+        self._color_codes: list[np.ndarray] = []
+        self._information: dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of "Mediciones" rows collected.
+        """
+        return sum(self._lengths)
+
+    def append(self, data: ASFT_Data) -> None:
+        """
+        Adds a measurement whose runway length and starting position are set.
+        """
+        # Read everything before changing the batch, so a measurement that fails is left out entirely
+        aligned = data.measurements_with_chainage
+        color_codes = pd.Categorical(aligned["Color Code"], categories=COLOR_LABELS).codes
+        information = information_row(data)
+
+        for column, (source, _) in MEASUREMENT_COLUMNS.items():
+            self._arrays[column].append(aligned[source].to_numpy())
+        self._color_codes.append(color_codes)
+        for column, value in information.items():
+            self._information.setdefault(column, []).append(value)
+        self._ids.append(data.id_1)
+        self._lengths.append(len(aligned))
+
+    def tables(self) -> dict[str, pd.DataFrame]:
+        """
+        Returns the "Mediciones" and "Información" tables of every measurement appended, in order.
+        """
+        if not self._ids:
+            return {"Mediciones": pd.DataFrame(), "Información": pd.DataFrame()}
+
+        ids = pd.Index(self._ids).unique()
+        id_codes = np.repeat(ids.get_indexer(self._ids).astype(np.int32), self._lengths)
+        rows = len(id_codes)
+
+        measurements = {"id_1": pd.Categorical.from_codes(id_codes, categories=ids)}
+        for column, (_, dtype) in MEASUREMENT_COLUMNS.items():
+            values = np.empty(rows, dtype=dtype)
+            np.concatenate(self._arrays[column], out=values, casting="unsafe")
+            measurements[column] = values
+        color_codes = np.empty(rows, dtype=np.int8)
+        np.concatenate(self._color_codes, out=color_codes, casting="unsafe")
+        measurements["criticidad"] = pd.Categorical.from_codes(color_codes, categories=COLOR_LABELS)
+
+        information = pd.DataFrame(self._information)
+        information["id_1"] = pd.Categorical(information["id_1"], categories=ids)
+        return {"Mediciones": pd.DataFrame(measurements, copy=False), "Información": information}
@@ -3,8 +3,27 @@ from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
 from tkinter import PhotoImage
 from src.excel_generation.excel_db import create_measurement_file
+from src.startup import init_locale
+from src import instrumentation
+import contextlib
 import os
+import queue
 import sys
+import threading
+
+# How often the main thread checks the worker's queue, in milliseconds
+POLL_INTERVAL_MS = 100
+
+# Diagnostic modes: label -> profiler (see src.instrumentation.profiling). Every mode but "Ninguno"
+# writes the per-stage timings to METRICS_FILE in the target directory.
+DIAGNOSTIC_MODES = {
+    "Ninguno": None,
+    "Tiempos": None,
+    "cProfile": "cprofile",
+    "tracemalloc": "tracemalloc",
+}
+METRICS_FILE = "asft_metrics.jsonl"
+PROFILE_FILES = {"cprofile": "asft_profile.prof", "tracemalloc": "asft_memory.txt"}
 
 
 def resource_path(relative_path):
@@ -26,8 +45,14 @@ class MeasurementApp:
         icon = PhotoImage(file=resource_path(os.path.join("src", "gui", "logo.png")))
         self.root.iconphoto(True, icon)
 
+        # Messages from the worker thread: ("progress", event), ("done", summary) or ("error", exception)
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+
         self.setup_frames()
         self.init_fields()
+        self.init_progress()
         self.add_made_by_label()
 
     def setup_frames(self):
@@ -37,8 +62,11 @@ class MeasurementApp:
         self.button_frame = ttk.Frame(self.root, padding="10")
         self.button_frame.grid(row=1, column=0, sticky=tk.E)
 
+        self.progress_frame = ttk.Frame(self.root, padding="10")
+        self.progress_frame.grid(row=2, column=0, sticky=(tk.W, tk.E))
+
         self.footer_frame = ttk.Frame(self.root, padding="10")
-        self.footer_frame.grid(row=2, column=0, sticky=(tk.W, tk.E))
+        self.footer_frame.grid(row=3, column=0, sticky=(tk.W, tk.E))
 
     def add_made_by_label(self):
         # Add a label to the footer frame
@@ -143,10 +171,48 @@ class MeasurementApp:
             column=1, row=9
         )
 
-        # Submit Button
-        ttk.Button(self.button_frame, text="Generar", command=self.submit).grid(
-            column=0, row=0
+        # Diagnostics
+        ttk.Label(self.input_frame, text="Diagnóstico:").grid(
+            column=0, row=10, sticky=tk.W
+        )
+        self.diagnostic_var = tk.StringVar(value="Ninguno")
+        ttk.Combobox(
+            self.input_frame,
+            textvariable=self.diagnostic_var,
+            values=list(DIAGNOSTIC_MODES),
+            state="readonly",
+        ).grid(column=1, row=10)
+
+        # Submit and Cancel Buttons
+        self.submit_button = ttk.Button(
+            self.button_frame, text="Generar", command=self.submit
+        )
+        self.submit_button.grid(column=0, row=0)
+        self.cancel_button = ttk.Button(
+            self.button_frame, text="Cancelar", command=self.cancel, state="disabled"
+        )
+        self.cancel_button.grid(column=1, row=0)
+
+    def init_progress(self):
+        self.progress_frame.columnconfigure(0, weight=1)
+        self.progress_bar = ttk.Progressbar(
+            self.progress_frame, orient=tk.HORIZONTAL, mode="determinate"
         )
+        self.progress_bar.grid(column=0, row=0, columnspan=2, sticky=(tk.W, tk.E))
+
+        self.status_var = tk.StringVar()
+        ttk.Label(self.progress_frame, textvariable=self.status_var).grid(
+            column=0, row=1, columnspan=2, sticky=tk.W
+        )
+
+        # One line per processed file, with its status
+        self.file_list = tk.Listbox(self.progress_frame, height=6)
+        self.file_list.grid(column=0, row=2, sticky=(tk.W, tk.E))
+        scrollbar = ttk.Scrollbar(
+            self.progress_frame, orient=tk.VERTICAL, command=self.file_list.yview
+        )
+        scrollbar.grid(column=1, row=2, sticky=(tk.N, tk.S))
+        self.file_list.configure(yscrollcommand=scrollbar.set)
 
     def select_asft_measurements_folder(self):
         directory = filedialog.askdirectory(
@@ -216,26 +282,126 @@ class MeasurementApp:
                 messagebox.showerror("Error", f"{name} must be an integer.")
                 return
 
-        # Assuming all validations pass, call create_measurement_file
+        # Assuming all validations pass, run create_measurement_file in a background thread.
+        # Tk variables can only be read from this thread, so the arguments are collected here.
+        arguments = dict(
+            asft_measurements_folder=Path(self.asft_measurements_folder_var.get()),
+            target_directory=Path(self.target_directory_var.get()),
+            runway_length=self.runway_length_var.get(),
+            runway_starting_position_0118=self.runway_starting_position_0118_var.get(),
+            runway_starting_position_1936=self.runway_starting_position_1936_var.get(),
+            operator=self.operator_var.get(),
+            ambient_temperature=self.ambient_temperature_var.get(),
+            surface_temperature=self.surface_temperature_var.get(),
+            humidity=self.humidity_var.get(),
+            observations=self.observations_var.get(),
+        )
+
+        self.cancel_event.clear()
+        self.progress_bar.configure(value=0, maximum=1)
+        self.status_var.set("Procesando...")
+        self.file_list.delete(0, tk.END)
+        self.submit_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+
+        self.worker = threading.Thread(
+            target=self.run,
+            args=(arguments, self.diagnostic_var.get()),
+            daemon=True,
+        )
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_messages)
+
+    def run(self, arguments, diagnostic="Ninguno"):
+        """
+        Worker thread: processes the measurements and reports back through the message queue only.
+        With a diagnostic mode, timings and profiler reports are written to the target directory.
+        """
         try:
-            create_measurement_file(
-                asft_measurements_folder=Path(self.asft_measurements_folder_var.get()),
-                target_directory=Path(self.target_directory_var.get()),
-                runway_length=self.runway_length_var.get(),
-                runway_starting_position_0118=self.runway_starting_position_0118_var.get(),
-                runway_starting_position_1936=self.runway_starting_position_1936_var.get(),
-                operator=self.operator_var.get(),
-                ambient_temperature=self.ambient_temperature_var.get(),
-                surface_temperature=self.surface_temperature_var.get(),
-                humidity=self.humidity_var.get(),
-                observations=self.observations_var.get(),
-            )
-            messagebox.showinfo("Finalizado", "Mediciones cargadas con éxito.")
+            with contextlib.ExitStack() as stack:
+                if diagnostic != "Ninguno":
+                    target_directory = arguments["target_directory"]
+                    hook = instrumentation.JsonLinesHook(target_directory / METRICS_FILE)
+                    stack.callback(hook.close)
+                    stack.enter_context(instrumentation.hooked(hook))
+                    profile = DIAGNOSTIC_MODES[diagnostic]
+                    if profile is not None:
+                        stack.enter_context(
+                            instrumentation.profiling(
+                                profile, target_directory / PROFILE_FILES[profile]
+                            )
+                        )
+                summary = create_measurement_file(
+                    **arguments,
+                    progress=lambda event: self.messages.put(("progress", event)),
+                    cancel_event=self.cancel_event,
+                )
+            self.messages.put(("done", summary))
         except Exception as e:
-            messagebox.showerror("Error", str(e))
+            self.messages.put(("error", e))
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.cancel_button.configure(state="disabled")
+        self.status_var.set("Cancelando...")
+
+    def poll_messages(self):
+        finished = False
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.show_progress(payload)
+            elif kind == "done":
+                self.show_summary(payload)
+                finished = True
+            else:
+                messagebox.showerror("Error", str(payload))
+                finished = True
+
+        if finished:
+            self.status_var.set("")
+            self.submit_button.configure(state="normal")
+            self.cancel_button.configure(state="disabled")
+            self.worker = None
+        else:
+            self.root.after(POLL_INTERVAL_MS, self.poll_messages)
+
+    def show_progress(self, event):
+        self.progress_bar.configure(value=event["done"], maximum=max(event["total"], 1))
+        name = Path(event["file"]).name
+        self.status_var.set(f"{event['done']}/{event['total']} {name}")
+        line = f"{name}: {event['status']}"
+        if event["message"]:
+            line += f" ({event['message']})"
+        self.file_list.insert(tk.END, line)
+        self.file_list.see(tk.END)
+
+    def show_summary(self, summary):
+        lines = [f"Mediciones agregadas: {len(summary.written)}"]
+        if summary.skipped:
+            lines.append(f"Omitidas (ya cargadas): {len(summary.skipped)}")
+        if summary.failed:
+            lines.append(f"Con errores: {len(summary.failed)}")
+            lines += [
+                f"  {Path(failure['file']).name}: {failure['error']}"
+                for failure in summary.failed
+            ]
+
+        if summary.cancelled:
+            messagebox.showwarning("Cancelado", "\n".join(["Proceso cancelado."] + lines))
+        elif summary.failed:
+            messagebox.showwarning("Finalizado con errores", "\n".join(lines))
+        else:
+            messagebox.showinfo(
+                "Finalizado", "\n".join(["Mediciones cargadas con éxito."] + lines)
+            )
 
 
 def main_app():
+    init_locale()
     root = tk.Tk()
     app = MeasurementApp(root)
     root.mainloop()
@@ -0,0 +1,209 @@
+"""
+Lightweight instrumentation of the ingestion pipeline.
+
+The pipeline reports per-file, per-stage timings and counters (pages, rows, bytes written) as plain
+dict records, e.g.:
+
+    {"event": "stage", "stage": "extract_text", "file": "AEP RWY13 L3_240228_103726", "seconds": 0.041, "pages": 9}
+
+Stages can nest: "build_tables" includes the "align_chainage" it triggers. Records are passed to
+every registered hook. With no hook registered, nothing is measured and the overhead is a single
+check per stage. JsonLinesHook writes the records as JSON lines; any callable taking a record can be
+registered too.
+
+    with instrumentation.hooked(JsonLinesHook("metrics.jsonl")):
+        create_measurement_file(...)
+
+profiling() additionally runs a block under cProfile or tracemalloc.
+"""
+import contextlib
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TextIO, Union
+
+Hook = Callable[[dict], None]
+
+PROFILING_MODES = ("cprofile", "tracemalloc")
+
+_hooks: list[Hook] = []
+
+
+def enabled() -> bool:
+    """
+    Returns whether any hook is registered, i.e. whether records are being collected.
+    """
+    return bool(_hooks)
+
+
+def add_hook(hook: Hook) -> None:
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+@contextlib.contextmanager
+def hooked(hook: Hook) -> Iterator[Hook]:
+    """
+    Registers a hook for the duration of a block.
+    """
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def emit(event: str, **fields) -> None:
+    """
+    Sends a record to every registered hook.
+
+    Args:
+        event (str): Kind of record, e.g. "stage" or "file".
+        **fields: Content of the record.
+    """
+    if not _hooks:
+        return
+    record = {"event": event, "time": time.time(), **fields}
+    for hook in list(_hooks):
+        hook(record)
+
+
+@contextlib.contextmanager
+def stage(name: str, file: Optional[str] = None, **counters) -> Iterator[dict]:
+    """
+    Times a stage of the pipeline and emits a "stage" record when it ends.
+
+    The yielded dict holds the record's counters; the stage can add to it, e.g. counters["rows"] = 210.
+    Nothing is timed when no hook is registered.
+
+    Args:
+        name (str): Name of the stage, e.g. "extract_text".
+        file (str, optional): Name of the file being processed.
+        **counters: Initial counters of the record.
+    """
+    if not _hooks:
+        yield counters
+        return
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        emit(
+            "stage",
+            stage=name,
+            file=file,
+            seconds=round(time.perf_counter() - start, 6),
+            **counters,
+        )
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[list[dict]]:
+    """
+    Collects the records emitted during a block into a list, instead of passing them to the registered
+    hooks. Used in worker processes, whose records are sent back and emitted by the parent.
+    """
+    global _hooks
+    records = []
+    saved_hooks, _hooks = _hooks, [records.append]
+    try:
+        yield records
+    finally:
+        _hooks = saved_hooks
+
+
+def replay(records: list[dict]) -> None:
+    """
+    Passes records collected elsewhere (see collect) to the registered hooks.
+    """
+    for record in records:
+        for hook in list(_hooks):
+            hook(record)
+
+
+class JsonLinesHook:
+    """
+    Hook writing each record as a line of JSON, to a file or to an open text stream.
+
+    Args:
+        target (Union[str, Path, TextIO]): Path of the file to append to, or a stream such as sys.stderr.
+    """
+
+    def __init__(self, target: Union[str, Path, TextIO]) -> None:
+        if isinstance(target, (str, Path)):
+            self.stream = open(target, "a", encoding="utf-8")
+            self._owned = True
+        else:
+            self.stream = target
+            self._owned = False
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self.stream.close()
+
+
+@contextlib.contextmanager
+def profiling(mode: Optional[str], output: Union[str, Path], top: int = 30) -> Iterator[None]:
+    """
+    Runs a block under a profiler and writes its report.
+
+    Args:
+        mode (Optional[str]): "cprofile" (cProfile, only profiles the calling thread), "tracemalloc"
+            (allocations by line and peak memory), or None to run the block as is.
+        output (Union[str, Path]): Report file. cProfile stats are written as .prof (open with pstats or
+            snakeviz) next to a text summary; tracemalloc writes a text summary.
+        top (int, optional): Number of entries in the text summaries. Defaults to 30.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILING_MODES:
+        raise ValueError(
+            f"Unknown profiling mode {mode!r}. Available modes: {', '.join(PROFILING_MODES)}."
+        )
+
+    output = Path(output)
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output)
+            with open(output.with_suffix(".txt"), "w", encoding="utf-8") as file:
+                pstats.Stats(profiler, stream=file).sort_stats("cumulative").print_stats(top)
+            emit("profile", mode=mode, output=str(output))
+        return
+
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        statistics = snapshot.statistics("lineno")[:top]
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(f"Peak: {peak / 1024**2:.2f} MiB, still allocated: {current / 1024**2:.2f} MiB\n")
+            file.writelines(f"{statistic}\n" for statistic in statistics)
+        emit("profile", mode=mode, output=str(output), peak_bytes=peak, current_bytes=current)
@@ -1,22 +1,138 @@
-import pandas as pd
+from __future__ import annotations
+
+import logging
 import re
 
+from functools import lru_cache
 from pathlib import Path
-from pypdf import PdfReader
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+from src.startup import lazy_import
+from src.instrumentation import stage
+from src.pdf_processing.parse_cache import ParseCache, content_hash
+from src.pdf_processing.criticality import CriticalityProfile, classify, get_profile, to_labels
+from src.pdf_processing.columnar import MeasurementColumns
+from src.pdf_processing.records import Configuration, FrictionReport, ResultSummary
+from src.pdf_processing.report_schema import CONFIGURATION_SCHEMA, REPORT_SCHEMA
+from src.pdf_processing.text_extraction import (
+    ContentStreamTextExtractor,
+    PypdfTextExtractor,
+    check_backend,
+)
+
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pypdf = lazy_import("pypdf")
+
+logger = logging.getLogger(__name__)
+
+REPORT_PAGE_TITLE = "Friction Measure Report"
+
+# Distance, friction and speed of a measurement row, written without separators, e.g. "100.6958"
+MEASUREMENT_PATTERN = re.compile(r"(\d+?)(\d{1}\.\d{2})(\d{2})")
+
+# (column, dtype, value for chainages without measurements) in the order of measurements_with_chainage
+ALIGNED_COLUMNS = [
+    ("Distance", "int64", 0),
+    ("Friction", "float64", 0.0),
+    ("Av. Friction 100m", "float64", 0.0),
+    ("Speed", "int64", 0),
+    ("Color Code", object, "blanco"),
+]
+
+
+@lru_cache(maxsize=32)
+def _chainage_values(runway_length: int, step: int = 10, reversed: bool = False) -> np.ndarray:
+    """
+    Chainage values from 0 to runway_length every `step` meters, always ending at runway_length.
+    The result is shared between calls, so it is returned read-only.
+    """
+    chainage = np.arange(0, runway_length + 1, step, dtype=np.int64)
+    if len(chainage) == 0 or chainage[-1] != runway_length:
+        chainage = np.append(chainage, np.int64(runway_length))
+    if reversed:
+        chainage = chainage[::-1].copy()
+    chainage.flags.writeable = False
+    return chainage
+
+
+def _read_only_frame(columns: dict) -> pd.DataFrame:
+    """
+    Builds a DataFrame whose columns are read-only arrays, so the frames kept in an object's cache
+    can be handed out as shallow copies without callers being able to modify them in place.
+    """
+    arrays = {}
+    for name, values in columns.items():
+        array = np.array(values)
+        array.flags.writeable = False
+        arrays[name] = array
+    return pd.DataFrame(arrays, copy=False)
+
+
+def _chainage_index(
+    runway_length: int, position: int, step: int = 10, reversed: bool = False
+) -> Optional[int]:
+    """
+    Row of `position` in the table returned by _chainage_values, or None if it is not a chainage value.
+    """
+    last_index = runway_length // step + (1 if runway_length % step else 0)
+    if position == runway_length:
+        index = last_index
+    elif 0 <= position < runway_length and position % step == 0:
+        index = position // step
+    else:
+        return None
+    return last_index - index if reversed else index
 
 
 # TODO: fix chainage table with color code (not reference color names inside the function, delete coumn and recall it)
 # TODO: fix report extractor, place everything insied a function
 class ASFT_Data:
-    def __init__(self, file_path: Path) -> None:
-        self.filename: str = file_path.stem
-        self.reader: PdfReader = PdfReader(file_path)
+    __slots__ = (
+        "file_path",
+        "filename",
+        "_reader",
+        "_parse_cache",
+        "_text_backend",
+        "_cache",
+        "_measurements_frame",
+        "_runway_length",
+        "_runway_starting_position",
+        "_criticality_profile",
+        "operator",
+        "ambient_temperature",
+        "surface_temperature",
+        "humidity",
+        "observations",
+    )
+
+    def __init__(
+        self,
+        file_path: Path,
+        parse_cache: Optional[ParseCache] = None,
+        text_backend: str = "pypdf",
+    ) -> None:
+        self.file_path: Path = Path(file_path)
+        self.filename: str = self.file_path.stem
+        self._reader = None
+        self._parse_cache = parse_cache
+        self._text_backend = check_backend(text_backend)
 
         self._cache = {}
+        self._measurements_frame = None
+        if parse_cache is not None:
+            with stage("parse_cache", self.filename) as counters:
+                cached = parse_cache.get(self.content_hash, self._text_backend)
+                counters["hit"] = cached is not None
+            if cached is not None:
+                self._cache.update(cached)
 
         # Manually set properties
-        self.runway_length = None
-        self.runway_starting_position = None
+        self._runway_length = None
+        self._runway_starting_position = None
+        self._criticality_profile = get_profile("OACI")
         self.operator = None
         self.ambient_temperature = None
         self.surface_temperature = None
@@ -44,23 +160,95 @@ class ASFT_Data:
         """
         return f"ASFT_Data Object: {self.filename}"
 
+    @classmethod
+    def from_parsed(cls, file_path: Path, parsed: dict) -> "ASFT_Data":
+        """
+        Builds an ASFT_Data object from the output of `parse`, without opening the pdf file.
+
+        Args:
+            file_path (Path): Path of the pdf file the results were extracted from.
+            parsed (dict): Extraction results as returned by `parse`.
+
+        Returns:
+            ASFT_Data: An object whose extraction cache is already populated.
+        """
+        data = cls(file_path)
+        data._cache.update(parsed)
+        return data
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Returns:
+            SHA-256 digest of the pdf file's content.
+        """
+        key = "content_hash"
+        if key not in self._cache:
+            self._cache[key] = content_hash(self.file_path)
+        return self._cache[key]
+
+    @property
+    def reader(self) -> PdfReader:
+        if self._reader is None:
+            with stage("open_pdf", self.filename) as counters:
+                self._reader = pypdf.PdfReader(self.file_path)
+                counters["bytes"] = self.file_path.stat().st_size
+                counters["pages"] = len(self._reader.pages)
+        return self._reader
+
+    def close(self) -> None:
+        """
+        Releases the pdf reader and any extracted page text. Extraction results are kept, and the
+        pdf is opened again if an extractor still needs it.
+        """
+        self._reader = None
+        self._cache.pop("page_text", None)
+
+    def __enter__(self) -> "ASFT_Data":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def parse(self) -> dict:
+        """
+        Runs every pdf extractor and returns their results as plain, picklable objects.
+        The pdf file is only opened if the results are not already cached; fresh results are
+        stored in the parse cache, if the object has one.
+
+        Returns:
+            dict: The measurement columns and the report, results and configuration tables, keyed as in the extraction cache.
+        """
+        keys = ("measurements", "report", "results", "configuration")
+        cached = all(key in self._cache for key in keys)
+
+        self._measurements_extractor()
+        self._report_extractor()
+        self._results_extractor()
+        self._get_configuration()
+        parsed = {key: self._cache[key] for key in keys}
+
+        if self._parse_cache is not None and not cached:
+            self._parse_cache.put(self.content_hash, parsed, self._text_backend)
+        return parsed
+
     @property
-    def friction_measurement_report(self) -> pd.DataFrame:
+    def friction_measurement_report(self) -> FrictionReport:
         """
         Returns:
-            Configuration Tyre Type      Date and Time Tyre Pressure  Type Water Film Equipment Average Speed  Pilot System Distance Ice Level Runway Length Location
-        0  RGL RWY 07 R3      ASTM  23-03-10 11:29:28           2.1  ASTM         ON   SFT0148            66  SUPER         2398.58         0          3300     ASFT
+            FrictionReport(tyre_type='ASTM', tyre_pressure=2.1, type='ASTM', water_film='ON', equipment='SFT0148',
+            average_speed=66, pilot='SUPER', system_distance=2398.58, ice_level=0, runway_length=3300, location='ASFT',
+            date=datetime.date(2023, 3, 10), time=datetime.time(11, 29, 28), configuration='RGL RWY 07 R3')
         """
-        return self._report_extractor(self.reader)
+        return self._report_extractor()
 
     @property
-    def result_summary(self) -> pd.DataFrame:
+    def result_summary(self) -> ResultSummary:
         """
         Returns:
-          Fric. A Fric. B Fric. C Fric. Max Fric. Min Fric. Avg
-        0    0.64    0.68    0.64      0.82      0.42      0.65
+            ResultSummary(fric_a=0.64, fric_b=0.68, fric_c=0.64, fric_max=0.82, fric_min=0.42, fric_avg=0.65)
         """
-        return self._results_extractor(self.reader)
+        return self._results_extractor()
 
     @property
     def measurements(self) -> pd.DataFrame:
@@ -75,10 +263,57 @@ class ASFT_Data:
                 ...    ...     ...              ...
                 1760   0.88    66               0.81
         """
-        df = self._measurements_extractor()
-        df["Av. Friction 100m"] = self._rolling_average(df["Friction"])
-        df["Color Code"] = self._color_assignment(df["Av. Friction 100m"])
-        return df
+        if self._measurements_frame is not None:
+            return self._measurements_frame.copy(deep=False)
+
+        key = "derived measurements"
+        if key not in self._cache:
+            columns = self._measurements_extractor()
+            with stage("derive_measurements", self.filename, rows=len(columns)):
+                averaged_friction = self._rolling_average(
+                    pd.Series(columns.friction / 100)
+                ).to_numpy()
+                self._cache[key] = columns.with_derived(
+                    averaged_friction, classify(averaged_friction, self.criticality_profile)
+                )
+        frame = self._cache[key].to_frame()
+        self._measurements_frame = _read_only_frame(
+            {column: frame[column].to_numpy() for column in frame.columns}
+        )
+        return self._measurements_frame.copy(deep=False)
+
+    @property
+    def runway_length(self) -> Optional[int]:
+        return self._runway_length
+
+    @runway_length.setter
+    def runway_length(self, value: Optional[int]) -> None:
+        if value != self._runway_length:
+            self._cache.pop("aligned measurements", None)
+        self._runway_length = value
+
+    @property
+    def criticality_profile(self) -> CriticalityProfile:
+        return self._criticality_profile
+
+    @criticality_profile.setter
+    def criticality_profile(self, value: Union[str, CriticalityProfile]) -> None:
+        value = get_profile(value)
+        if value != self._criticality_profile:
+            self._cache.pop("derived measurements", None)
+            self._cache.pop("aligned measurements", None)
+            self._measurements_frame = None
+        self._criticality_profile = value
+
+    @property
+    def runway_starting_position(self) -> Optional[int]:
+        return self._runway_starting_position
+
+    @runway_starting_position.setter
+    def runway_starting_position(self, value: Optional[int]) -> None:
+        if value != self._runway_starting_position:
+            self._cache.pop("aligned measurements", None)
+        self._runway_starting_position = value
 
     @property
     def measurements_with_chainage(self) -> pd.DataFrame:
@@ -107,8 +342,8 @@ class ASFT_Data:
             216        40         0      0.00      0                0.0
 
         Raises:
-            ValueError: If the measurements table overflows the chainage table. This error suggests adjusting the starting
-                        point or the runway length.
+            ValueError: If the measurements table overflows the chainage table, or if the starting point is not one of
+                        its chainage values. This error suggests adjusting the starting point or the runway length.
 
 
             |=============|===================================================================|=============|
@@ -131,52 +366,47 @@ class ASFT_Data:
             raise ValueError(
                 "Please set the runway length and starting point before calling this function."
             )
-        numbering = int(self.configuration.loc[0, "numbering"])
+        key = "aligned measurements"
+        if key in self._cache:
+            return self._cache[key].copy(deep=False)
+
+        numbering = int(self.configuration.numbering)
         reverse = (
             True if 19 <= numbering <= 36 else False if 1 <= numbering <= 18 else None
         )
 
-        chainage = self._chainage_table(self.runway_length, reversed=reverse)
-
-        start_index = chainage[
-            chainage["Chainage"] == self.runway_starting_position
-        ].index[0]
+        chainage = _chainage_values(self.runway_length, 10, bool(reverse))
+        start_index = _chainage_index(
+            self.runway_length, self.runway_starting_position, 10, bool(reverse)
+        )
+        if start_index is None:
+            raise ValueError(
+                "The starting point is not a chainage of the runway. Please adjust the starting point or the runway length."
+            )
 
-        if start_index + len(self.measurements) > len(chainage):
+        measurements = self.measurements
+        end_index = start_index + len(measurements)
+        if end_index > len(chainage):
             raise ValueError(
                 "The measurements table overflows the chainage table. Please adjust the starting point or the runway length."
             )
 
-        float_columns = [
-            "Friction",
-            "Av. Friction 100m",
-        ]
-        for col in float_columns:
-            if col in chainage.columns:
-                chainage[col] = chainage[col].astype(float)
-            elif col in self.measurements.columns:
-                chainage[col] = 0.0
-        for col in self.measurements.columns:
-            if col not in chainage.columns:
-                chainage[col] = "blanco" if col == "Color Code" else 0
-
-            for i, value in enumerate(self.measurements[col]):
-                chainage.at[start_index + i, col] = value
-
-        headers = [
-            "Chainage",
-            "Distance",
-            "Friction",
-            "Av. Friction 100m",
-            "Speed",
-            "Color Code",
-        ]
-        chainage = chainage[headers]
+        with stage("align_chainage", self.filename, rows=len(chainage)):
+            aligned = {"Chainage": chainage}
+            for col, dtype, fill in ALIGNED_COLUMNS:
+                column = np.full(len(chainage), fill, dtype=dtype)
+                column[start_index:end_index] = measurements[col].to_numpy()
+                aligned[col] = column
 
-        return chainage
+            self._cache[key] = _read_only_frame(aligned)
+        return self._cache[key].copy(deep=False)
 
     @property
-    def configuration(self) -> pd.DataFrame:
+    def configuration(self) -> Configuration:
+        """
+        Returns:
+            Configuration(iata='AEP', numbering='13', runway='13-31', absolute_side='L', relative_side='L', separation='3m')
+        """
         return self._get_configuration()
 
     @property
@@ -185,115 +415,183 @@ class ASFT_Data:
 
     @property
     def id_2(self) -> str:
-        return (
-            f"{self.configuration.loc[0, 'iata']}"
-            f"{self.configuration.loc[0, 'runway']}"
+        return f"{self.configuration.iata}{self.configuration.runway}"
+
+    def _page_text(self, page_number: int, reader: Optional[PdfReader] = None) -> str:
+        """
+        Extracts the text of a page, at most once per page.
+
+        Args:
+            page_number (int): Zero-based index of the page.
+            reader (PdfReader, optional): Reader to extract from. Defaults to the object's own reader.
+
+        Returns:
+            str: The extracted text, or an empty string for pages without content.
+        """
+        texts = self._cache.setdefault("page_text", {})
+        if page_number not in texts:
+            page = (reader or self.reader).pages[page_number]
+            texts[page_number] = PypdfTextExtractor().page_text(page)
+        return texts[page_number]
+
+    def _release_page_texts(self) -> None:
+        """
+        Drops the extracted page texts once every extractor that reads them has run.
+        """
+        if all(key in self._cache for key in ("measurements", "report", "results")):
+            self._cache.pop("page_text", None)
+            self._cache.pop("report_fields", None)
+
+    def _page_texts(self, start: int = 0) -> Iterator[tuple[int, str]]:
+        """
+        Lazily yields (page number, text) pairs, extracting each page only when the caller asks for it.
+        Callers can stop iterating as soon as they have what they need.
+
+        Args:
+            start (int, optional): Zero-based index of the first page. Defaults to 0.
+        """
+        for page_number in range(start, len(self.reader.pages)):
+            yield page_number, self._page_text(page_number)
+
+    def _measurement_page_texts(self) -> tuple[list[str], str]:
+        """
+        Extracts the text of every page with the object's text backend (see text_extraction).
+
+        With "auto", the content stream texts of the first, middle and last measurement pages are
+        checked against pypdf's; if their measurement rows differ, every page is read with pypdf instead.
+
+        Returns:
+            tuple[list[str], str]: The page texts, and the backend that extracted them.
+        """
+        if self._text_backend == "pypdf":
+            return [text for _, text in self._page_texts()], "pypdf"
+
+        # Content stream texts are not kept in the page text cache, which the report and results
+        # extractors read pypdf's layout from
+        extractor = ContentStreamTextExtractor()
+        texts = [extractor.page_text(page) for page in self.reader.pages]
+        if self._text_backend == "content-stream":
+            return texts, "content-stream"
+
+        measurement_pages = [
+            page_number
+            for page_number, text in enumerate(texts)
+            if text and not text.startswith(REPORT_PAGE_TITLE)
+        ]
+        checked = (
+            [measurement_pages[index] for index in (0, len(measurement_pages) // 2, -1)]
+            if measurement_pages
+            else []
         )
+        for page_number in dict.fromkeys(checked):
+            expected = MEASUREMENT_PATTERN.findall(self._page_text(page_number))
+            if MEASUREMENT_PATTERN.findall(texts[page_number]) != expected:
+                logger.warning(
+                    "%s: the content stream text of page %d differs from pypdf's, using pypdf",
+                    self.filename,
+                    page_number + 1,
+                )
+                return [text for _, text in self._page_texts()], "pypdf"
+        return texts, "content-stream"
 
-    def _measurements_extractor(self):
+    def _measurements_extractor(self) -> MeasurementColumns:
         """
-            Distance  Friction  Speed  Av. Friction 100m Color Code
-        0          10      0.69     58               0.00      white
-        1          20      0.68     60               0.00      white
-        2          30      0.71     62               0.00      white
-        3          40      0.71     63               0.00      white
-        4          50      0.71     66               0.00      white
-        ..        ...       ...    ...                ...        ...
+        Returns the measurement columns found in the pdf. `.to_frame()` gives:
+            Distance  Friction  Speed
+        0          10      0.69     58
+        1          20      0.68     60
+        2          30      0.71     62
+        3          40      0.71     63
+        4          50      0.71     66
+        ..        ...       ...    ...
         """
 
         key = "measurements"
         if key not in self._cache:
-            pattern = r"(\d+?)(\d{1}\.\d{2})(\d{2})"
-            measurement = []
-            for page_number in range(len(self.reader.pages)):
-                page = self.reader.pages[page_number]
-                text = page.extract_text()
-                if text:
-                    matches = re.findall(pattern, text)
-                    for match in matches:
-                        distance = int(match[0])
-                        friction = float(match[1])
-                        speed = int(match[2])
-                        measurement.append((distance, friction, speed))
-
-            self._cache[key] = pd.DataFrame(
-                measurement, columns=["Distance", "Friction", "Speed"]
-            )
+            with stage("extract_text", self.filename) as counters:
+                texts, counters["backend"] = self._measurement_page_texts()
+                counters["pages"] = len(texts)
+
+            with stage("parse_measurements", self.filename) as counters:
+                measurement = []
+                for text in texts:
+                    # The report page holds the header and results, never measurement rows
+                    if text and not text.startswith(REPORT_PAGE_TITLE):
+                        measurement.extend(MEASUREMENT_PATTERN.findall(text))
+
+                self._cache[key] = MeasurementColumns.from_matches(measurement)
+                counters["rows"] = len(measurement)
+            self._release_page_texts()
         return self._cache[key]
 
-    def _report_extractor(self, reader):
+    def _report_extractor(self, reader: Optional[PdfReader] = None) -> FrictionReport:
         """
-          Tyre Type Tyre Pressure  Type Water Film Equipment Average Speed  Pilot System Distance Ice Level Runway Length Location        Date      Time Configuration
-        0      ASTM           2.1  ASTM         ON   SFT0161            65  SUPER          2204.3         0          2100     ASFT  2024-02-28  10:47:38  AEP RWY31 L3
+        FrictionReport(tyre_type='ASTM', tyre_pressure=2.1, type='ASTM', water_film='ON', equipment='SFT0161',
+        average_speed=65, pilot='SUPER', system_distance=2204.3, ice_level=0, runway_length=2100, location='ASFT',
+        date=datetime.date(2024, 2, 28), time=datetime.time(10, 47, 38), configuration='AEP RWY31 L3')
         """
 
         key = "report"
         if key not in self._cache:
-            page = reader.pages[0]
-            text = page.extract_text()
-            patterns = {
-                "Tyre Type": r"Tyre Type\s+(.+?)\s*$",
-                "Date and Time": r"Date and Time\s+(.+?)\s+Tyre Pressure",
-                "Tyre Pressure": r"Tyre Pressure\s+(.+?)\s*$",
-                "Type": r"Type\s+(\w+)",
-                "Water Film": r"Water Film\s+(.+?)\s*$",
-                "Equipment": r"Equipment\s+(\w+)",
-                "Average Speed": r"Average Speed\s+(.+?)\s*$",
-                "Pilot": r"Pilot\s+(\w+)",
-                "System Distance": r"System Distance\s+(.+?)\s*$",
-                "Ice Level": r"Ice Level\s+(.+?)\s*$",
-                "Runway Length": r"Runway Length\s+(.+?)\s*$",
-                "Location": r"Location\s+(.+?)\s*$",
-            }
-
-            extracted_values = {}
-            for key, pattern in patterns.items():
-                match = re.search(pattern, text, re.MULTILINE)
-                extracted_values[key] = match.group(1) if match else None
-
-            df = pd.DataFrame([extracted_values])
-
-            df["Date and Time"] = pd.to_datetime(
-                df["Date and Time"], format="%y-%m-%d %H:%M:%S"
-            )
-            df["Date"] = df["Date and Time"].dt.date
-            df["Time"] = df["Date and Time"].dt.time
-            df.drop(columns=["Date and Time"], inplace=True)
-
-            start = text.find("Configuration") + len("Configuration ")
-            end = text.find("Tyre Type")
-            configuration_text = text[start:end].replace("\n", " ").strip()
-
-            df["Configuration"] = configuration_text
-
-            self._cache[key] = df
+            fields = self._report_fields(reader)
+            with stage("parse_report", self.filename):
+                convert = REPORT_SCHEMA.convert
+                values = {
+                    name: convert(column, fields[column])
+                    for name, column in FrictionReport.COLUMNS.items()
+                    if column in fields
+                }
+                date_and_time = convert("Date and Time", fields["Date and Time"])
+                if date_and_time is not None:
+                    values["date"] = date_and_time.date()
+                    values["time"] = date_and_time.time()
+                self._cache[key] = FrictionReport(**values)
+            self._release_page_texts()
         return self._cache[key]
 
-    def _results_extractor(self, reader):
+    def _results_extractor(self, reader: Optional[PdfReader] = None) -> ResultSummary:
         """
-          Fric. A Fric. B Fric. C Fric. Max Fric. Min Fric. Avg
-        0    0.64    0.68    0.64      0.82      0.42      0.65
+        ResultSummary(fric_a=0.64, fric_b=0.68, fric_c=0.64, fric_max=0.82, fric_min=0.42, fric_avg=0.65)
         """
 
         key = "results"
         if key not in self._cache:
-            page = reader.pages[0]
-            text = page.extract_text()
-            pattern = r"\d\.\d{2}µ"
-            found_values = re.findall(pattern, text)
-            first_six_values = [value.replace("µ", "") for value in found_values[:6]]
-            headers = [
-                "Fric. A",
-                "Fric. B",
-                "Fric. C",
-                "Fric. Max",
-                "Fric. Min",
-                "Fric. Avg",
-            ]
-
-            self._cache[key] = pd.DataFrame([first_six_values], columns=headers)
+            fields = self._report_fields(reader)
+            with stage("parse_results", self.filename):
+                first_six_values = fields["Results"][: len(ResultSummary.COLUMNS)]
+                self._cache[key] = ResultSummary(
+                    *(REPORT_SCHEMA.convert("Results", value) for value in first_six_values)
+                )
+            self._release_page_texts()
         return self._cache[key]
 
+    def _report_fields(self, reader: Optional[PdfReader] = None) -> dict:
+        """
+        Scans the report page once for every field of REPORT_SCHEMA, shared by the report and results
+        extractors.
+
+        Returns:
+            dict: The matched text of each field (see Schema.scan).
+        """
+        key = "report_fields"
+        if key not in self._cache:
+            text = self._page_text(0, reader)
+            with stage("scan_report", self.filename):
+                self._cache[key] = REPORT_SCHEMA.scan(text, typed=False)
+        return self._cache[key]
+
+    @property
+    def header(self) -> dict:
+        """
+        The typed fields of the report page, read without extracting the measurement pages, e.g. to
+        index an archive of reports.
+
+        Returns:
+            {'Tyre Type': 'ASTM', 'Date and Time': datetime.datetime(2024, 2, 28, 10, 37, 26), 'Tyre Pressure': 2.1, ...,
+            'Runway Length': 2100, 'Location': 'ASFT', 'Configuration': 'AEP RWY13 L3', 'Results': [0.63, 0.63, ...]}
+        """
+        return REPORT_SCHEMA.to_types(self._report_fields())
+
     def _rolling_average(
         self,
         series: pd.Series,
@@ -323,13 +621,13 @@ class ASFT_Data:
     def _color_assignment(self, series: pd.Series) -> pd.Series:
         """
         Assign a color to each friction average in a given pandas series based on the friction average,
-        and propagate 'red' color to a window of 5 positions before and after each 'red' friction average,
-        omitting rows where the color is 'white', following OACI and FAA recommendations.
+        and propagate 'red' color to a window of positions before and after each 'red' friction average.
+        Thresholds and window size come from the object's criticality profile (OACI by default).
 
         The color assignment rules are as follows:
         - 'white' for friction average equal to 0.0
-        - 'red' for friction average less than 0.5
-        - 'yellow' for friction average less than 0.6 but not less than 0.5
+        - 'red' for friction average less than the profile's minimum friction (0.5)
+        - 'yellow' for friction average less than the maintenance friction (0.6) but not less than the minimum
         - 'green' otherwise
 
         Args:
@@ -337,32 +635,10 @@ class ASFT_Data:
 
         Returns:
             pd.Series: A pandas series with assigned colors, where 'red' color is propagated
-            to 5 positions before and after each 'red' friction average, omitting 'white' rows.
+            to the profile's red window of positions before and after each 'red' friction average.
         """
-
-        def assign_color_based_on_friction(friction_average):
-            if friction_average == 0.0:
-                return "blanco"
-            elif friction_average < 0.5:
-                return "rojo"
-            elif friction_average < 0.6:
-                return "amarillo"
-            else:
-                return "verde"
-
-        assigned_colors = series.apply(assign_color_based_on_friction)
-
-        red_color_mask = assigned_colors == "rojo"
-        white_color_mask = assigned_colors == "blanco"
-
-        for offset in range(-5, 6):
-            shifted_red_mask = assigned_colors.shift(offset) == "rojo"
-            shifted_white_mask = assigned_colors.shift(offset) == "blanco"
-            red_color_mask |= shifted_red_mask & ~shifted_white_mask
-
-        assigned_colors.loc[red_color_mask] = "rojo"
-
-        return assigned_colors
+        codes = classify(series.to_numpy(), self.criticality_profile)
+        return pd.Series(to_labels(codes), index=series.index, name=series.name)
 
     def _chainage_table(
         self, runway_length: int, step: int = 10, reversed: bool = False
@@ -379,25 +655,19 @@ class ASFT_Data:
             pd.DataFrame: A pandas DataFrame containing a single column named "chainage" with chainage values at the
             specified step intervals, starting from 0 and ending with the runway_length value.
         """
-        chainage = list(range(0, runway_length + 1, step))
-        if chainage[-1] != runway_length:
-            chainage.append(runway_length)
-
-        df = pd.DataFrame(chainage, columns=["Chainage"])
-
-        if reversed:
-            df = df[::-1].reset_index(drop=True)
-
-        return df
+        return pd.DataFrame(
+            {"Chainage": _chainage_values(runway_length, step, reversed).copy()}
+        )
 
-    def _get_configuration(self):
+    def _get_configuration(self) -> Configuration:
         key = "configuration"
         if key not in self._cache:
-            config = self.friction_measurement_report.loc[0, "Configuration"]
+            config = self.friction_measurement_report.configuration
 
-            _temp: str = re.findall(r"[A-Z][0-9]", config)[-1]
-            iata: str = re.search(r"^[A-Z]{3}", config).group()
-            numbering: str = re.search(r"\d{2}(?=\D|$)", config).group()
+            fields = CONFIGURATION_SCHEMA.scan(config, typed=False)
+            _temp: str = fields["position"]
+            iata: str = fields["iata"]
+            numbering: str = fields["numbering"]
             relative_side: str = _temp[0]
             separation: int = int(_temp[1])
 
@@ -427,17 +697,13 @@ class ASFT_Data:
                     absolute_side = "L" if relative_side == "R" else "R"
                 return absolute_side
 
-            self._cache[key] = pd.DataFrame(
-                [
-                    {
-                        "iata": iata,
-                        "numbering": numbering,
-                        "runway": get_runway_designation(numbering),
-                        "absolute side": get_absolute_side(numbering, relative_side),
-                        "relative side": relative_side,
-                        "separation": separation,
-                    }
-                ]
+            self._cache[key] = Configuration(
+                iata=iata,
+                numbering=numbering,
+                runway=get_runway_designation(numbering),
+                absolute_side=get_absolute_side(numbering, relative_side),
+                relative_side=relative_side,
+                separation=separation,
             )
         return self._cache[key]
 
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+from src.startup import lazy_import
+from src.pdf_processing.criticality import to_labels
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+def _unsigned(values, dtype="uint16") -> np.ndarray:
+    """
+    Stores non-negative integers in `dtype`, or in uint32 if they don't fit.
+    """
+    dtype = np.dtype(dtype)
+    array = np.asarray(values, dtype=np.int64)
+    if len(array) and array.max() > np.iinfo(dtype).max:
+        dtype = np.uint32
+    return array.astype(dtype)
+
+
+@dataclass(slots=True)
+class MeasurementColumns:
+    """
+    Compact, typed columns of a measurements table. Pandas DataFrames are only built on demand.
+
+    Friction values have exactly two decimals, so they are stored as integer hundredths and converted
+    back to the same float64 values the pdf text reads.
+
+    Attributes:
+        distance (np.ndarray): Distance in meters (uint16).
+        friction (np.ndarray): Friction in hundredths (uint16).
+        speed (np.ndarray): Speed in km/h (uint8).
+        average_friction (np.ndarray, optional): Rolling average of the friction in hundredths (uint16).
+        color_codes (np.ndarray, optional): Criticality color codes, indexes into criticality.COLOR_LABELS (uint8).
+    """
+
+    distance: np.ndarray
+    friction: np.ndarray
+    speed: np.ndarray
+    average_friction: Optional[np.ndarray] = None
+    color_codes: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_matches(cls, matches: list[tuple[str, str, str]]) -> "MeasurementColumns":
+        """
+        Builds the columns from (distance, friction, speed) text matches, e.g. ("10", "0.79", "62").
+        """
+        return cls(
+            distance=_unsigned([int(match[0]) for match in matches]),
+            friction=_unsigned([int(match[1].replace(".", "")) for match in matches]),
+            speed=np.asarray([int(match[2]) for match in matches], dtype=np.uint8),
+        )
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (
+                self.distance,
+                self.friction,
+                self.speed,
+                self.average_friction,
+                self.color_codes,
+            )
+            if array is not None
+        )
+
+    def with_derived(
+        self, average_friction: np.ndarray, color_codes: np.ndarray
+    ) -> "MeasurementColumns":
+        """
+        Returns a copy that also holds the averaged friction (as float values) and the color codes.
+        """
+        return MeasurementColumns(
+            self.distance,
+            self.friction,
+            self.speed,
+            _unsigned(np.rint(np.asarray(average_friction) * 100)),
+            np.asarray(color_codes, dtype=np.uint8),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            Distance  Friction  Speed  Av. Friction 100m Color Code
+        0          10      0.69     58               0.00     blanco
+        ..        ...       ...    ...                ...        ...
+
+        The last two columns are only present once the derived values have been computed.
+        """
+        columns = {
+            "Distance": self.distance.astype(np.int64),
+            "Friction": self.friction / 100,
+            "Speed": self.speed.astype(np.int64),
+        }
+        if self.average_friction is not None:
+            columns["Av. Friction 100m"] = self.average_friction / 100
+        if self.color_codes is not None:
+            columns["Color Code"] = to_labels(self.color_codes)
+        return pd.DataFrame(columns, copy=False)
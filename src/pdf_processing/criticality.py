@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from src.startup import lazy_import
+
+np = lazy_import("numpy")
+
+# Color codes, in ascending order of friction. The integer code of a label is its index in this tuple.
+COLOR_LABELS = ("blanco", "rojo", "amarillo", "verde")
+WHITE, RED, YELLOW, GREEN = range(len(COLOR_LABELS))
+
+
+@dataclass(frozen=True)
+class CriticalityProfile:
+    """
+    Friction thresholds used to classify averaged friction values.
+
+    Attributes:
+        name (str): Name of the profile.
+        minimum_friction (float): Averages below this value are red (rojo).
+        maintenance_friction (float): Averages below this value, but not below minimum_friction, are yellow (amarillo).
+        red_window (int): Number of rows before and after each red average that are also marked red.
+    """
+
+    name: str
+    minimum_friction: float = 0.5
+    maintenance_friction: float = 0.6
+    red_window: int = 5
+
+
+# ICAO (OACI) and FAA minimum / maintenance planning levels for a continuous friction measuring
+# device run at 65 km/h with a self-wetting system. Custom profiles can be passed directly, or added
+# here to make them selectable by name.
+PROFILES = {
+    "OACI": CriticalityProfile("OACI", 0.5, 0.6, 5),
+    "FAA": CriticalityProfile("FAA", 0.5, 0.6, 5),
+}
+
+
+def get_profile(profile) -> CriticalityProfile:
+    """
+    Returns a criticality profile, given either the profile itself or the name of a registered one.
+
+    Raises:
+        KeyError: If no profile is registered under the given name.
+    """
+    if isinstance(profile, CriticalityProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise KeyError(
+            f"Unknown criticality profile {profile!r}. Available profiles: {', '.join(PROFILES)}."
+        ) from None
+
+
+def classify(friction_averages, profile="OACI") -> np.ndarray:
+    """
+    Classifies averaged friction values into color codes and propagates red to the rows around it.
+
+    An average of exactly 0.0 means there is no data and is white. Every row within `red_window` rows
+    of a red average is also red.
+
+    Args:
+        friction_averages (array-like): Averaged friction values.
+        profile (Union[str, CriticalityProfile], optional): Profile, or name of a registered profile. Defaults to "OACI".
+
+    Returns:
+        np.ndarray: uint8 color codes, indexes into COLOR_LABELS.
+    """
+    profile = get_profile(profile)
+    values = np.asarray(friction_averages, dtype=np.float64)
+
+    codes = np.digitize(
+        values, [profile.minimum_friction, profile.maintenance_friction]
+    ).astype(np.uint8) + np.uint8(RED)
+    codes[values == 0.0] = WHITE
+
+    red = codes == RED
+    if red.any() and profile.red_window > 0:
+        window = np.ones(2 * profile.red_window + 1, dtype=np.int64)
+        red = (
+            np.convolve(red, window)[profile.red_window : profile.red_window + len(red)]
+            > 0
+        )
+        codes[red] = RED
+
+    return codes
+
+
+def to_labels(codes: np.ndarray) -> np.ndarray:
+    """
+    Converts color codes into their labels (blanco, rojo, amarillo, verde).
+    """
+    return np.asarray(COLOR_LABELS, dtype=object)[codes]
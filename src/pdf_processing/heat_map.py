@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+from src.startup import lazy_import
+from src.pdf_processing.criticality import classify, get_profile, to_labels
+
+if TYPE_CHECKING:
+    from src.pdf_processing.ASFT_Data import ASFT_Data
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Lanes of a friction campaign, named by absolute side and separation from the runway axis in meters
+# (5 is the edge, "borde"), from the left edge to the right edge
+LANES = ("L5", "L3", "R3", "R5")
+
+STEP = 10
+
+
+def lane_of(data: ASFT_Data) -> str:
+    """
+    Returns the lane of a measurement, e.g. "L5" for the left edge.
+    """
+    configuration = data.configuration
+    separation = configuration.separation
+    separation = "5" if separation == "borde" else separation.removesuffix("m")
+    return f"{configuration.absolute_side}{separation}"
+
+
+def _lane_order(lane: str) -> tuple:
+    """
+    Sorts lanes from the left edge to the right edge.
+    """
+    side, separation = lane[0], int(lane[1:])
+    return (0, -separation) if side == "L" else (1, separation)
+
+
+class HeatMap:
+    """
+    Dense (chainage × lane) grid of the friction measured on a runway campaign, e.g. every run of one
+    airport, runway and date.
+
+    Each cell holds the sum of the friction and of the 100 m friction averages of the runs measured
+    there, and the number of runs, so grids can be built incrementally and merged; means are computed
+    on demand. Rows are the runway chainage every STEP meters (see ASFT_Data.measurements_with_chainage);
+    columns are LANES, plus any other lane measured.
+
+    Args:
+        runway_length (int): Runway length in meters.
+        lanes (tuple[str, ...], optional): Initial columns. Defaults to LANES.
+    """
+
+    def __init__(self, runway_length: int, lanes: tuple[str, ...] = LANES) -> None:
+        self.runway_length = int(runway_length)
+        self.lanes: list[str] = sorted(lanes, key=_lane_order)
+        rows = -(-self.runway_length // STEP) + 1
+        self.friction = np.zeros((rows, len(self.lanes)), dtype=np.float64)
+        self.average_friction = np.zeros((rows, len(self.lanes)), dtype=np.float64)
+        self.runs = np.zeros((rows, len(self.lanes)), dtype=np.int32)
+
+    @property
+    def chainage(self) -> np.ndarray:
+        """
+        Chainage of each row: every STEP meters, ending at the runway length.
+        """
+        chainage = np.arange(len(self.runs), dtype=np.int64) * STEP
+        chainage[-1] = self.runway_length
+        return chainage
+
+    def _column(self, lane: str) -> int:
+        if lane not in self.lanes:
+            self.lanes = sorted([*self.lanes, lane], key=_lane_order)
+            index = self.lanes.index(lane)
+            self.friction = np.insert(self.friction, index, 0.0, axis=1)
+            self.average_friction = np.insert(self.average_friction, index, 0.0, axis=1)
+            self.runs = np.insert(self.runs, index, 0, axis=1)
+        return self.lanes.index(lane)
+
+    def add(self, data: ASFT_Data) -> None:
+        """
+        Adds a run, whose runway length and starting position are set, to its lane.
+
+        Raises:
+            ValueError: If the run was measured on a runway of another length.
+        """
+        if data.runway_length != self.runway_length:
+            raise ValueError(
+                f"The heat map is for a runway of {self.runway_length} m, the measurement is of {data.runway_length} m."
+            )
+        aligned = data.measurements_with_chainage
+        chainage = aligned["Chainage"].to_numpy()
+        measured = aligned["Distance"].to_numpy() > 0
+        # Chainages are multiples of STEP, except the runway length, which is the last row
+        rows = -(-chainage[measured] // STEP)
+
+        column = self._column(lane_of(data))
+        self.friction[rows, column] += aligned["Friction"].to_numpy()[measured]
+        self.average_friction[rows, column] += aligned["Av. Friction 100m"].to_numpy()[measured]
+        self.runs[rows, column] += 1
+
+    def merge(self, other: HeatMap) -> None:
+        """
+        Adds the runs of another heat map of the same runway.
+        """
+        if other.runway_length != self.runway_length:
+            raise ValueError(
+                f"Can't merge heat maps of runways of {self.runway_length} m and {other.runway_length} m."
+            )
+        columns = [self._column(lane) for lane in other.lanes]
+        self.friction[:, columns] += other.friction
+        self.average_friction[:, columns] += other.average_friction
+        self.runs[:, columns] += other.runs
+
+    def mean(self, average: bool = False) -> np.ndarray:
+        """
+        Returns the grid of the mean friction of each cell (of the 100 m averages if `average`), NaN
+        where no run was measured.
+        """
+        sums = self.average_friction if average else self.friction
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.runs > 0, sums / self.runs, np.nan)
+
+    def criticality(self, profile="OACI") -> np.ndarray:
+        """
+        Returns the grid of color codes of each cell (see criticality.classify), classifying each lane's
+        mean 100 m friction averages along the runway.
+        """
+        means = np.nan_to_num(self.mean(average=True).round(2), nan=0.0)
+        profile = get_profile(profile)
+        codes = np.empty(means.shape, dtype=np.uint8)
+        for column in range(means.shape[1]):
+            codes[:, column] = classify(means[:, column], profile)
+        return codes
+
+    def to_frame(self, profile="OACI", **keys) -> pd.DataFrame:
+        """
+        Returns the grid as a compact table, one row per chainage, e.g.:
+
+              iata   pista       fecha  progresiva  fricción L5  ...  fricción R5  criticidad L5  ...  criticidad R5
+        0      AEP   13-31  2024-02-28           0         None  ...         None         blanco  ...         blanco
+        1      AEP   13-31  2024-02-28          10         0.69  ...         0.71          verde  ...          verde
+
+        Cells without runs are empty (None).
+
+        Args:
+            profile (Union[str, CriticalityProfile], optional): Criticality profile. Defaults to "OACI".
+            **keys: Columns identifying the campaign, repeated on every row, e.g. iata="AEP".
+        """
+        means = self.mean().round(2)
+        codes = self.criticality(profile)
+        columns = {key: value for key, value in keys.items()}
+        columns["progresiva"] = self.chainage
+        for column, lane in enumerate(self.lanes):
+            values = means[:, column].astype(object)
+            values[np.isnan(means[:, column])] = None
+            columns[f"fricción {lane}"] = values
+        for column, lane in enumerate(self.lanes):
+            columns[f"criticidad {lane}"] = to_labels(codes[:, column])
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def sidecar_path(file_path: Union[str, Path], runway_length: int) -> Path:
+        """
+        Path of the file storing the heat map of a workbook or store for a runway length, next to it.
+        Each length has its own file, since grids of different lengths can't be merged.
+        """
+        file_path = Path(file_path)
+        return file_path.with_name(f"{file_path.name}.heatmap-{int(runway_length)}m.npz")
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        file_path = Path(file_path)
+        temp_path = file_path.with_name(f"{file_path.stem}.tmp.npz")
+        np.savez_compressed(
+            temp_path,
+            runway_length=self.runway_length,
+            lanes=np.array(self.lanes),
+            friction=self.friction,
+            average_friction=self.average_friction,
+            runs=self.runs,
+        )
+        temp_path.replace(file_path)
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> Optional[HeatMap]:
+        """
+        Loads a heat map saved with `save`, or returns None if the file doesn't exist or can't be read.
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            return None
+        try:
+            with np.load(file_path) as arrays:
+                heat_map = cls(int(arrays["runway_length"]), tuple(arrays["lanes"].tolist()))
+                heat_map.friction = arrays["friction"]
+                heat_map.average_friction = arrays["average_friction"]
+                heat_map.runs = arrays["runs"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return heat_map
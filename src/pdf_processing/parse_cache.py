@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from pathlib import Path
+from typing import Optional, Union
+from src.startup import lazy_import
+from src.pdf_processing.columnar import MeasurementColumns
+from src.pdf_processing.records import Configuration, FrictionReport, ResultSummary
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever an extractor in ASFT_Data changes what it returns, so stale entries are never read.
+PARSER_VERSION = "5"
+
+MEASUREMENT_COLUMNS = ["distance", "friction", "speed"]
+
+
+def content_hash(file_path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 digest of a file's content.
+
+    Args:
+        file_path (Union[str, Path]): The file to hash.
+        chunk_size (int, optional): Number of bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of ASFT pdf extraction results, keyed by the pdf's content hash, the text backend that
+    extracted its measurement pages and the parser version, so a run never reads results extracted by
+    another backend.
+
+    Each entry is a compressed .npz file holding the measurement columns and a .json file holding the
+    report, results and configuration records. When the cache grows beyond max_bytes, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], max_bytes: Optional[int] = 256 * 1024**2
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _key(self, digest: str, text_backend: str) -> str:
+        return f"{digest}-{text_backend}-v{PARSER_VERSION}"
+
+    def _paths(self, digest: str, text_backend: str) -> tuple[Path, Path]:
+        key = self._key(digest, text_backend)
+        return self.directory / f"{key}.npz", self.directory / f"{key}.json"
+
+    def get(self, digest: str, text_backend: str = "pypdf") -> Optional[dict]:
+        """
+        Returns the cached extraction results for a content hash and text backend, or None on a miss.
+        """
+        arrays_path, records_path = self._paths(digest, text_backend)
+        if not (arrays_path.exists() and records_path.exists()):
+            return None
+
+        try:
+            with np.load(arrays_path) as arrays:
+                measurements = MeasurementColumns(
+                    *(arrays[column] for column in MEASUREMENT_COLUMNS)
+                )
+            records = json.loads(records_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError, KeyError):
+            for path in (arrays_path, records_path):
+                path.unlink(missing_ok=True)
+            return None
+
+        for path in (arrays_path, records_path):
+            os.utime(path)
+
+        return {
+            "measurements": measurements,
+            "report": FrictionReport.from_json(records["report"]),
+            "results": ResultSummary.from_json(records["results"]),
+            "configuration": Configuration.from_json(records["configuration"]),
+        }
+
+    def put(self, digest: str, parsed: dict, text_backend: str = "pypdf") -> None:
+        """
+        Stores the extraction results returned by ASFT_Data.parse under a content hash and text backend.
+
+        Storing is best effort: the cache only saves work, so an entry that can't be written is logged
+        and left out.
+        """
+        try:
+            self._write(digest, parsed, text_backend)
+            self._evict()
+        except Exception as e:
+            logger.warning("No se pudo guardar %s en la caché de lectura: %s", digest, e)
+
+    def _write(self, digest: str, parsed: dict, text_backend: str) -> None:
+        arrays_path, records_path = self._paths(digest, text_backend)
+        measurements = parsed["measurements"]
+        records = {
+            "report": parsed["report"].to_json(),
+            "results": parsed["results"].to_json(),
+            "configuration": parsed["configuration"].to_json(),
+        }
+
+        # Write to temporary files first so a crash never leaves a half-written entry behind. Their
+        # names are unique, so workers storing the same pdf at once don't write over each other.
+        temp_paths = []
+        try:
+            for suffix in (".npz", ".json"):
+                handle, temp_path = tempfile.mkstemp(
+                    suffix=f"{suffix}.tmp", prefix=f"{self._key(digest, text_backend)}-", dir=self.directory
+                )
+                os.close(handle)
+                temp_paths.append(Path(temp_path))
+            temp_arrays_path, temp_records_path = temp_paths
+            with open(temp_arrays_path, "wb") as file:
+                np.savez_compressed(
+                    file,
+                    **{column: getattr(measurements, column) for column in MEASUREMENT_COLUMNS},
+                )
+            temp_records_path.write_text(json.dumps(records), encoding="utf-8")
+            os.replace(temp_arrays_path, arrays_path)
+            os.replace(temp_records_path, records_path)
+        finally:
+            for temp_path in temp_paths:
+                temp_path.unlink(missing_ok=True)
+
+    def invalidate(self, digest: str) -> None:
+        """
+        Removes the entries for a content hash, of every text backend.
+        """
+        for path in self.directory.glob(f"{digest}-*-v*.*"):
+            path.unlink(missing_ok=True)
+
+    def invalidate_file(self, file_path: Union[str, Path]) -> None:
+        """
+        Removes the entries for a pdf file, of every text backend.
+        """
+        self.invalidate(content_hash(file_path))
+
+    def clear(self) -> None:
+        """
+        Removes every entry in the cache directory.
+        """
+        for path in self.directory.glob("*-v*.*"):
+            path.unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """
+        Returns the total size in bytes of the cached entries.
+        """
+        return sum(size for size, _ in self._entries().values())
+
+    def _entries(self) -> dict[str, tuple[int, float]]:
+        """
+        Returns the size and last use of every entry, keyed by entry. Files removed meanwhile by another
+        process are left out.
+        """
+        entries = {}
+        for path in self.directory.glob("*-v*.*"):
+            if path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = path.name.split(".")[0]
+            size, last_used = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+
+        entries = self._entries()
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for suffix in (".npz", ".json"):
+                (self.directory / f"{key}{suffix}").unlink(missing_ok=True)
+            total -= size
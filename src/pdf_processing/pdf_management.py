@@ -1,18 +1,196 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
 from src.pdf_processing.ASFT_Data import ASFT_Data
+from src.pdf_processing.parse_cache import ParseCache
+from src import instrumentation
 
 
-def create_asft_objects(directory: Path) -> list[ASFT_Data]:
+def _parse_pdf(
+    file_path: Path,
+    parse_cache: Optional[ParseCache] = None,
+    instrument: bool = False,
+    text_backend: str = "pypdf",
+) -> tuple[dict, list[dict]]:
+    """
+    Worker function: parses a single .pdf file and returns its extraction results.
+
+    :param file_path: A Path object representing the .pdf file.
+    :param parse_cache: Optional on-disk cache consulted before, and filled after, parsing.
+    :param instrument: Whether to collect the instrumentation records of the parse.
+    :param text_backend: Text extraction backend of the measurement pages (see text_extraction).
+    :return: A dictionary of picklable extraction results (see ASFT_Data.parse), and the
+        instrumentation records to emit in the parent process.
+    """
+    if not instrument:
+        with ASFT_Data(file_path, parse_cache, text_backend) as asft_data:
+            return asft_data.parse(), []
+    with instrumentation.collect() as records:
+        with ASFT_Data(file_path, parse_cache, text_backend) as asft_data:
+            parsed = asft_data.parse()
+    return parsed, records
+
+
+def _pdf_files(directory: Path, recursive: bool = False) -> list[Path]:
+    """
+    Lists the .pdf files in the given directory, sorted by path so that results are deterministic.
+
+    :param directory: A Path object representing the directory.
+    :param recursive: Whether to include .pdf files in subdirectories. Defaults to False.
+    :return: A sorted list of Path objects for .pdf files.
+    """
+    pattern = "**/*.pdf" if recursive else "*.pdf"
+    return sorted(
+        file_path
+        for file_path in directory.glob(pattern)
+        if file_path.is_file() and file_path.suffix.lower() == ".pdf"
+    )
+
+
+def iter_pdf_files(
+    source: Union[Path, Iterable[Path]], recursive: bool = False
+) -> Iterator[Path]:
+    """
+    Yields the .pdf files to process: those found in a directory, or the given files themselves.
+
+    :param source: A directory, or an iterable of .pdf file paths.
+    :param recursive: Whether to search subdirectories when source is a directory. Defaults to False.
+    :return: An iterator of Path objects for .pdf files.
+    """
+    if isinstance(source, (str, Path)):
+        yield from _pdf_files(Path(source), recursive)
+    else:
+        yield from (Path(file_path) for file_path in source)
+
+
+def iter_asft_objects(
+    source: Union[Path, Iterable[Path]],
+    recursive: bool = False,
+    workers: int = 1,
+    parse_cache: Optional[ParseCache] = None,
+    on_error: Optional[Callable[[Path, Exception], None]] = None,
+    text_backend: str = "pypdf",
+) -> Iterator[ASFT_Data]:
+    """
+    Lazily yields a parsed ASFT_Data object for each .pdf file, in file order.
+
+    Each pdf is opened only when the consumer asks for the next object, and closed as soon as its
+    extraction is done, so memory and open files stay bounded however many files there are. With
+    more than one worker, at most two files per worker are parsed ahead of the consumer.
+
+    :param source: A directory, or an iterable of .pdf file paths.
+    :param recursive: Whether to search subdirectories when source is a directory. Defaults to False.
+    :param workers: Number of worker processes used to parse the files. Defaults to 1 (no pool).
+    :param parse_cache: Optional on-disk cache of extraction results.
+    :param on_error: Called with the file path and the exception when a file can't be parsed; the file
+        is then skipped. If not given, the exception is raised.
+    :param text_backend: Text extraction backend of the measurement pages: "pypdf", "content-stream"
+        or "auto" (see text_extraction). Defaults to "pypdf".
+    :return: An iterator of parsed ASFT_Data objects.
+    """
+    file_paths = iter_pdf_files(source, recursive)
+
+    def handle(file_path: Path, error: Exception) -> None:
+        if on_error is None:
+            raise error
+        on_error(file_path, error)
+
+    if workers <= 1:
+        for file_path in file_paths:
+            try:
+                with ASFT_Data(file_path, parse_cache, text_backend) as asft_data:
+                    asft_data.parse()
+            except Exception as e:
+                handle(file_path, e)
+                continue
+            yield asft_data
+        return
+
+    parse = partial(
+        _parse_pdf,
+        parse_cache=parse_cache,
+        instrument=instrumentation.enabled(),
+        text_backend=text_backend,
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def next_result() -> Optional[ASFT_Data]:
+            file_path, future = pending.popleft()
+            try:
+                parsed, records = future.result()
+                instrumentation.replay(records)
+                return ASFT_Data.from_parsed(file_path, parsed)
+            except Exception as e:
+                handle(file_path, e)
+                return None
+
+        try:
+            for file_path in file_paths:
+                pending.append((file_path, executor.submit(parse, file_path)))
+                if len(pending) >= 2 * workers:
+                    asft_data = next_result()
+                    if asft_data is not None:
+                        yield asft_data
+            while pending:
+                asft_data = next_result()
+                if asft_data is not None:
+                    yield asft_data
+        finally:
+            # If the consumer stops early, don't wait for the files that were parsed ahead
+            for _, future in pending:
+                future.cancel()
+
+
+def iter_report_headers(
+    source: Union[Path, Iterable[Path]],
+    recursive: bool = False,
+    on_error: Optional[Callable[[Path, Exception], None]] = None,
+) -> Iterator[tuple[Path, dict]]:
+    """
+    Lazily yields the typed report page fields of each .pdf file (see ASFT_Data.header), without
+    extracting the measurement pages, e.g. to index an archive of reports.
+
+    :param source: A directory, or an iterable of .pdf file paths.
+    :param recursive: Whether to search subdirectories when source is a directory. Defaults to False.
+    :param on_error: Called with the file path and the exception when a file can't be read; the file
+        is then skipped. If not given, the exception is raised.
+    :return: An iterator of (file path, header fields) pairs.
+    """
+    for file_path in iter_pdf_files(source, recursive):
+        try:
+            with ASFT_Data(file_path) as asft_data:
+                header = asft_data.header
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(file_path, e)
+            continue
+        yield file_path, header
+
+
+def create_asft_objects(
+    directory: Path, workers: int = 1, parse_cache: Optional[ParseCache] = None
+) -> list[ASFT_Data]:
     """
     Creates ASFT_Data objects for each .pdf file in the given directory.
 
+    When workers is greater than 1, the pdf files are parsed in a process pool and the objects are
+    rebuilt from the returned results, so no PdfReader crosses the process boundary.
+    When a parse cache is given, files whose content was parsed before are loaded from it instead
+    of being opened, and newly parsed files are added to it.
+
     :param directory: A Path object representing the directory.
-    :return: A list of ASFT_Data objects for .pdf files.
+    :param workers: Number of worker processes used to parse the files. Defaults to 1 (no pool).
+    :param parse_cache: Optional on-disk cache of extraction results.
+    :return: A list of ASFT_Data objects for .pdf files, sorted by file name.
     """
-    asft_data_objects = []
-    for file_path in directory.glob("*.pdf"):
-        if file_path.is_file() and file_path.suffix.lower() == ".pdf":
-            asft_data = ASFT_Data(file_path)
-            asft_data_objects.append(asft_data)
+    file_paths = _pdf_files(directory)
+
+    if workers <= 1 and parse_cache is None:
+        return [ASFT_Data(file_path) for file_path in file_paths]
 
-    return asft_data_objects
+    workers = min(workers, max(len(file_paths), 1))
+    return list(iter_asft_objects(file_paths, workers=workers, parse_cache=parse_cache))
@@ -0,0 +1,181 @@
+"""
+Typed records of the report page of an ASFT pdf: the report header, the results summary and the
+configuration read from it.
+
+Each record is a slotted dataclass with the types of its values (numbers, dates and times), so a run's
+metadata costs a few attributes instead of a one-row DataFrame. `to_frame` builds the one-row table
+with the report's column names for callers that still need one, and `to_json` / `from_json` convert
+to and from the plain values stored by the parse cache.
+
+    >>> data.result_summary.fric_avg
+    0.65
+    >>> data.result_summary.to_frame()
+      Fric. A  Fric. B  Fric. C  Fric. Max  Fric. Min  Fric. Avg
+    0    0.64     0.68     0.64       0.82       0.42       0.65
+"""
+from __future__ import annotations
+
+import datetime
+
+from dataclasses import dataclass, fields
+from typing import ClassVar, Optional
+from src.startup import lazy_import
+from src.pdf_processing.report_schema import RESULT_COLUMNS
+
+pd = lazy_import("pandas")
+
+
+@dataclass(slots=True)
+class Record:
+    """
+    Base of the report records. COLUMNS maps each attribute to its column name in `to_frame`.
+    """
+
+    COLUMNS: ClassVar[dict[str, str]] = {}
+
+    def to_dict(self) -> dict:
+        """
+        Returns the values keyed by column name, in column order.
+        """
+        return {column: getattr(self, name) for name, column in self.COLUMNS.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns a one-row DataFrame with the values, keyed by column name.
+        """
+        return pd.DataFrame([self.to_dict()])
+
+    def to_json(self) -> dict:
+        """
+        Returns the values keyed by attribute name, with dates and times as ISO 8601 text.
+        """
+        values = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            values[field.name] = value
+        return values
+
+    @classmethod
+    def from_json(cls, values: dict) -> Record:
+        """
+        Builds a record from the values returned by `to_json`.
+        """
+        return cls(**values)
+
+
+@dataclass(slots=True)
+class FrictionReport(Record):
+    """
+    Header of the report page.
+
+    Attributes:
+        tyre_type (str): e.g. "ASTM".
+        tyre_pressure (float): In bar.
+        type (str): Measurement type, e.g. "ASTM".
+        water_film (str): Whether the self-wetting system was on, "ON" or "OFF".
+        equipment (str): Serial number of the friction tester, e.g. "SFT0161".
+        average_speed (int): In km/h.
+        pilot (str): Driver of the friction tester.
+        system_distance (float): Distance measured by the tester, in meters.
+        ice_level (int): Ice level reported by the tester.
+        runway_length (int): Runway length entered on the tester, in meters.
+        location (str): e.g. "ASFT".
+        date (datetime.date): Date of the measurement.
+        time (datetime.time): Time of the measurement.
+        configuration (str): Configuration string, e.g. "AEP RWY13 L3".
+
+    Values missing from the report, or that can't be read, are None.
+    """
+
+    COLUMNS: ClassVar[dict[str, str]] = {
+        "tyre_type": "Tyre Type",
+        "tyre_pressure": "Tyre Pressure",
+        "type": "Type",
+        "water_film": "Water Film",
+        "equipment": "Equipment",
+        "average_speed": "Average Speed",
+        "pilot": "Pilot",
+        "system_distance": "System Distance",
+        "ice_level": "Ice Level",
+        "runway_length": "Runway Length",
+        "location": "Location",
+        "date": "Date",
+        "time": "Time",
+        "configuration": "Configuration",
+    }
+
+    tyre_type: Optional[str] = None
+    tyre_pressure: Optional[float] = None
+    type: Optional[str] = None
+    water_film: Optional[str] = None
+    equipment: Optional[str] = None
+    average_speed: Optional[int] = None
+    pilot: Optional[str] = None
+    system_distance: Optional[float] = None
+    ice_level: Optional[int] = None
+    runway_length: Optional[int] = None
+    location: Optional[str] = None
+    date: Optional[datetime.date] = None
+    time: Optional[datetime.time] = None
+    configuration: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, values: dict) -> FrictionReport:
+        values = dict(values)
+        if values.get("date") is not None:
+            values["date"] = datetime.date.fromisoformat(values["date"])
+        if values.get("time") is not None:
+            values["time"] = datetime.time.fromisoformat(values["time"])
+        return cls(**values)
+
+
+@dataclass(slots=True)
+class ResultSummary(Record):
+    """
+    Friction results of the report page: the average of each third of the runway (A, B and C), and the
+    maximum, minimum and average of the whole run.
+    """
+
+    COLUMNS: ClassVar[dict[str, str]] = dict(
+        zip(("fric_a", "fric_b", "fric_c", "fric_max", "fric_min", "fric_avg"), RESULT_COLUMNS)
+    )
+
+    fric_a: Optional[float] = None
+    fric_b: Optional[float] = None
+    fric_c: Optional[float] = None
+    fric_max: Optional[float] = None
+    fric_min: Optional[float] = None
+    fric_avg: Optional[float] = None
+
+
+@dataclass(slots=True)
+class Configuration(Record):
+    """
+    Airport, runway and lane of a run, read from its configuration string.
+
+    Attributes:
+        iata (str): Airport code, e.g. "AEP".
+        numbering (str): Runway header the run started from, e.g. "13".
+        runway (str): Runway designation, e.g. "13-31".
+        absolute_side (str): Side of the runway axis seen from headers 01 to 18, "L" or "R".
+        relative_side (str): Side of the runway axis seen from the run's header, "L" or "R".
+        separation (str): Separation from the runway axis, e.g. "3m", or "borde" for the edge.
+    """
+
+    COLUMNS: ClassVar[dict[str, str]] = {
+        "iata": "iata",
+        "numbering": "numbering",
+        "runway": "runway",
+        "absolute_side": "absolute side",
+        "relative_side": "relative side",
+        "separation": "separation",
+    }
+
+    iata: str
+    numbering: str
+    runway: str
+    absolute_side: str
+    relative_side: str
+    separation: str
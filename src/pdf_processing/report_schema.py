@@ -0,0 +1,188 @@
+"""
+Declarative schema of the fields read from the report page of an ASFT pdf (header, results) and from
+its configuration string (airport, runway header, side and separation).
+
+Each field has a pattern whose first group is the value, a conversion to its type and a default for
+reports that don't have it. The fields of a schema are compiled once into a single regular expression
+(one lookahead per field, so fields may overlap like "Type" in "Tyre Type") and the text is scanned in
+one pass. New report layouts only need their fields added here.
+
+    >>> REPORT_SCHEMA.scan(text)["Runway Length"]
+    2100
+"""
+import datetime
+import logging
+import re
+
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+OCCURRENCES = ("first", "last", "all")
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    A value of a text, found by a pattern.
+
+    Attributes:
+        name (str): Name of the field in the scanned values.
+        pattern (str): Regular expression whose first group is the value. Patterns are compiled with
+            re.MULTILINE; use (?s:...) where "." must match line breaks.
+        convert (Callable[[str], Any]): Converts the matched text to the field's type. Defaults to str.
+        default (Any): Value of the field when it isn't found or can't be converted. Defaults to None.
+        occurrence (str): Whether the value is the "first" or "last" match, or the list of "all" of them.
+    """
+
+    name: str
+    pattern: str
+    convert: Callable[[str], Any] = str
+    default: Any = None
+    occurrence: str = "first"
+
+
+class Schema:
+    """
+    Fields read from a text in a single pass.
+
+    Two fields must not match at the same position: at each position, only the first field (in
+    schema order) that matches there is kept.
+
+    Args:
+        fields (list[Field]): The fields, in the order of the scanned values.
+
+    Raises:
+        ValueError: If a field has an unknown occurrence or a duplicated name.
+    """
+
+    def __init__(self, fields: list[Field]) -> None:
+        names = [field.name for field in fields]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicated field names in schema: {names}")
+        for field in fields:
+            if field.occurrence not in OCCURRENCES:
+                raise ValueError(
+                    f"Unknown occurrence {field.occurrence!r} of field {field.name!r}. "
+                    f"Available occurrences: {', '.join(OCCURRENCES)}."
+                )
+
+        self.fields = {field.name: field for field in fields}
+        # Each field is a capturing lookahead around its pattern, so the value is in the next group
+        self._groups = {}
+        alternatives = []
+        group = 1
+        for field in fields:
+            self._groups[group] = field
+            alternatives.append(f"(?=({field.pattern}))")
+            group += 1 + re.compile(field.pattern).groups
+        self._pattern = re.compile("|".join(alternatives), re.MULTILINE)
+
+    def scan(self, text: str, typed: bool = True) -> dict[str, Any]:
+        """
+        Reads every field of the schema from a text.
+
+        Args:
+            text (str): Text to scan, e.g. the extracted text of a report page.
+            typed (bool, optional): Whether to convert the values to their types. If False, the values are
+                the matched text, or None (an empty list for "all" fields) when not found. Defaults to True.
+
+        Returns:
+            dict[str, Any]: The value of every field, in schema order.
+        """
+        found: dict[str, list[str]] = {name: [] for name in self.fields}
+        for match in self._pattern.finditer(text):
+            group = match.lastindex
+            field = self._groups[group]
+            values = found[field.name]
+            if field.occurrence == "first" and values:
+                continue
+            values.append(match.group(group + 1))
+
+        values = {}
+        for name, field in self.fields.items():
+            matches = found[name]
+            if field.occurrence == "all":
+                values[name] = matches
+            elif matches:
+                values[name] = matches[0] if field.occurrence == "first" else matches[-1]
+            else:
+                values[name] = None
+        return self.to_types(values) if typed else values
+
+    def to_types(self, values: dict[str, Any]) -> dict[str, Any]:
+        """
+        Converts the untyped values returned by scan(text, typed=False) to their types.
+        """
+        result = {}
+        for name, value in values.items():
+            if self.fields[name].occurrence == "all":
+                result[name] = [self.convert(name, item) for item in value]
+            else:
+                result[name] = self.convert(name, value)
+        return result
+
+    def convert(self, name: str, value: Optional[str]) -> Any:
+        """
+        Converts the matched text of a field to its type, or returns the field's default if there was no
+        match or the text can't be converted. Texts that can't be converted are logged.
+        """
+        field = self.fields[name]
+        if value is None:
+            return field.default
+        try:
+            return field.convert(value)
+        except ValueError:
+            logger.warning("Valor ilegible en el campo %s del reporte: %r", name, value)
+            return field.default
+
+
+def _date_and_time(text: str) -> datetime.datetime:
+    return datetime.datetime.strptime(text, "%y-%m-%d %H:%M:%S")
+
+
+def _whole_number(text: str) -> int:
+    """
+    Converts a whole number that the report may print with decimals to the nearest int, e.g. "65.7"
+    to 66.
+    """
+    return round(float(text))
+
+
+def _single_line(text: str) -> str:
+    return text.replace("\n", " ").strip()
+
+
+# Header fields of the report page, in the order of the report table, then its results
+REPORT_SCHEMA = Schema(
+    [
+        Field("Tyre Type", r"Tyre Type\s+(.+?)\s*$"),
+        Field("Date and Time", r"Date and Time\s+(.+?)\s+Tyre Pressure", _date_and_time),
+        Field("Tyre Pressure", r"Tyre Pressure\s+(.+?)\s*$", float),
+        Field("Type", r"Type\s+(\w+)"),
+        Field("Water Film", r"Water Film\s+(.+?)\s*$"),
+        Field("Equipment", r"Equipment\s+(\w+)"),
+        Field("Average Speed", r"Average Speed\s+(.+?)\s*$", _whole_number),
+        Field("Pilot", r"Pilot\s+(\w+)"),
+        Field("System Distance", r"System Distance\s+(.+?)\s*$", float),
+        Field("Ice Level", r"Ice Level\s+(.+?)\s*$", _whole_number),
+        Field("Runway Length", r"Runway Length\s+(.+?)\s*$", _whole_number),
+        Field("Location", r"Location\s+(.+?)\s*$"),
+        Field("Configuration", r"Configuration(?s:.(.*?))Tyre Type", _single_line),
+        # Fric. A, B, C, Max, Min and Avg, then the same values in the results summary
+        Field("Results", r"(\d\.\d{2})µ", float, occurrence="all"),
+    ]
+)
+
+RESULT_COLUMNS = ["Fric. A", "Fric. B", "Fric. C", "Fric. Max", "Fric. Min", "Fric. Avg"]
+
+# Fields of a configuration string such as "AEP RWY13 L3" or "AEP 31 BORDE L5"
+CONFIGURATION_SCHEMA = Schema(
+    [
+        Field("iata", r"^([A-Z]{3})"),
+        Field("numbering", r"(\d{2})(?=\D|$)"),
+        # Relative side and separation, e.g. "L3"
+        Field("position", r"([A-Z][0-9])", occurrence="last"),
+    ]
+)
@@ -0,0 +1,291 @@
+"""
+Text extraction backends for the pages of ASFT reports.
+
+pypdf's extract_text reconstructs the page layout, which is most of the parsing time. The measurement
+rows only need their characters in drawing order, one line per row, so ContentStreamTextExtractor
+decodes the text-showing operators of the page content stream directly, using each font's ToUnicode
+map (or its simple encoding), and starts a new line whenever the text moves to another baseline.
+
+Backends, selectable per run:
+    "pypdf": pypdf's extract_text, for every page. The default, until the decoder has been checked
+        against more reports.
+    "content-stream": the content stream decoder, for the measurement pages.
+    "auto": the content stream decoder, checked against pypdf on a few pages of each file; if their
+        measurement rows differ, the whole file is read with pypdf.
+"""
+import re
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+TEXT_BACKENDS = ("pypdf", "content-stream", "auto")
+
+# Tokens of a content stream: array delimiters, hex strings, literal strings, names, and numbers or operators
+_TOKEN = re.compile(
+    rb"\[|\]|<<|>>|<[0-9A-Fa-f\s]*>|\((?:\\.|[^\\()])*\)|/[^\s/\[\]()<>{}%]*|[^\s/\[\]()<>{}%]+",
+    re.S,
+)
+# Text objects (BT ... ET), and the graphics state operators that move them (q, Q, cm), found between them
+_TEXT_OBJECT = re.compile(rb"(?<![^\s\]>)])BT\b(.*?)(?<![^\s\]>)])ET\b", re.S)
+_GRAPHICS_STATE = re.compile(rb"(?<![^\s\]>)])(cm|q|Q)(?![^\s\[(</])")
+_LITERAL_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+_ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.S)
+
+_CMAP_CODESPACE = re.compile(rb"begincodespacerange\s*<([0-9A-Fa-f]+)>")
+_CMAP_BFCHAR = re.compile(rb"beginbfchar(.*?)endbfchar", re.S)
+_CMAP_BFRANGE = re.compile(rb"beginbfrange(.*?)endbfrange", re.S)
+_HEX = re.compile(rb"<([0-9A-Fa-f]*)>")
+_RANGE = re.compile(rb"<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])")
+
+_SIMPLE_ENCODINGS = {
+    "/WinAnsiEncoding": "cp1252",
+    "/MacRomanEncoding": "mac_roman",
+}
+
+# Baselines closer than this (in text space units) are considered the same line
+_LINE_TOLERANCE = 1.0
+
+
+class TextExtractor(ABC):
+    """
+    Extracts the text of pdf pages. Create one per file: extractors may cache per-file data such as fonts.
+    """
+
+    name: str
+
+    @abstractmethod
+    def page_text(self, page) -> str:
+        """
+        Returns the text of a pypdf page, or an empty string for pages without content.
+        """
+
+
+class PypdfTextExtractor(TextExtractor):
+    """pypdf's layout-reconstructing extract_text."""
+
+    name = "pypdf"
+
+    def page_text(self, page) -> str:
+        return page.extract_text() if page.get_contents() is not None else ""
+
+
+def _unescape_literal(data: bytes) -> bytes:
+    def replace(match: re.Match) -> bytes:
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        if escaped in (b"\n", b"\r", b"\r\n"):
+            return b""
+        return _LITERAL_ESCAPES.get(escaped, escaped)
+
+    return _ESCAPE.sub(replace, data)
+
+
+def _utf16(hex_digits: bytes) -> str:
+    return bytes.fromhex(hex_digits.decode()).decode("utf-16-be", "replace")
+
+
+class _FontDecoder:
+    """Decodes the strings shown with a font into text."""
+
+    def __init__(self, font) -> None:
+        self.code_length = 1
+        self.unicode: Optional[dict[int, str]] = None
+        self.encoding = "latin-1"
+
+        to_unicode = font.get("/ToUnicode") if font is not None else None
+        if to_unicode is not None:
+            self._read_cmap(to_unicode.get_object().get_data())
+        else:
+            encoding = font.get("/Encoding") if font is not None else None
+            if isinstance(encoding, str):
+                self.encoding = _SIMPLE_ENCODINGS.get(encoding, "latin-1")
+            if font is not None and font.get("/Subtype") == "/Type0":
+                # Two-byte codes without a map to unicode can't be decoded
+                self.code_length = 2
+                self.unicode = {}
+
+    def _read_cmap(self, cmap: bytes) -> None:
+        codespace = _CMAP_CODESPACE.search(cmap)
+        if codespace:
+            self.code_length = max(len(codespace.group(1)) // 2, 1)
+        self.unicode = {}
+        for block in _CMAP_BFCHAR.findall(cmap):
+            codes = _HEX.findall(block)
+            for source, target in zip(codes[::2], codes[1::2]):
+                self.unicode[int(source, 16)] = _utf16(target)
+        for block in _CMAP_BFRANGE.findall(cmap):
+            for low, high, target in _RANGE.findall(block):
+                low, high = int(low, 16), int(high, 16)
+                if target.startswith(b"["):
+                    for offset, value in enumerate(_HEX.findall(target)):
+                        self.unicode[low + offset] = _utf16(value)
+                else:
+                    start = int(target[1:-1], 16)
+                    width = len(target[1:-1])
+                    for offset in range(high - low + 1):
+                        self.unicode[low + offset] = _utf16(
+                            f"{start + offset:0{width}X}".encode()
+                        )
+
+    def decode(self, data: bytes) -> str:
+        if self.unicode is None:
+            return data.decode(self.encoding, "replace")
+        if self.code_length == 1:
+            return "".join(self.unicode.get(code, "") for code in data)
+        return "".join(
+            self.unicode.get(int.from_bytes(data[i : i + self.code_length], "big"), "")
+            for i in range(0, len(data), self.code_length)
+        )
+
+
+def _multiply(m: list[float], n: list[float]) -> list[float]:
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+class ContentStreamTextExtractor(TextExtractor):
+    """
+    Decodes the text-showing operators (Tj, TJ, ', ") of the page content stream, in drawing order.
+    Text drawn on the same baseline is concatenated without separators, as pypdf does for ASFT tables.
+
+    Only text objects are tokenized; between them, only the operators changing the transformation
+    matrix are read, so the paths and images making up most of a page are skipped.
+    """
+
+    name = "content-stream"
+
+    def __init__(self) -> None:
+        self._decoders: dict = {}
+
+    def _decoder(self, fonts, name: str) -> _FontDecoder:
+        reference = fonts.raw_get(name) if fonts is not None and name in fonts else None
+        key = (reference.idnum, reference.generation) if hasattr(reference, "idnum") else name
+        if key not in self._decoders:
+            font = fonts[name].get_object() if reference is not None else None
+            self._decoders[key] = _FontDecoder(font)
+        return self._decoders[key]
+
+    def page_text(self, page) -> str:
+        contents = page.get_contents()
+        if contents is None:
+            return ""
+        resources = page.get("/Resources")
+        resources = resources.get_object() if resources is not None else {}
+        fonts = resources.get("/Font")
+        fonts = fonts.get_object() if fonts is not None else None
+
+        identity = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        ctm, ctm_stack = identity, []
+        tm = tlm = identity
+        leading = 0.0
+        decoder = _FontDecoder(None)
+        lines, line, last_y = [], [], None
+
+        def show(data: bytes) -> None:
+            nonlocal last_y, line
+            y = _multiply(tm, ctm)[5]
+            if last_y is not None and abs(y - last_y) > _LINE_TOLERANCE:
+                lines.append("".join(line))
+                line = []
+            last_y = y
+            line.append(decoder.decode(data))
+
+        def move(tx: float, ty: float) -> None:
+            nonlocal tm, tlm
+            tlm = _multiply([1.0, 0.0, 0.0, 1.0, tx, ty], tlm)
+            tm = tlm
+
+        data = contents.get_data()
+        position = 0
+        for text_object in _TEXT_OBJECT.finditer(data):
+            for operator in _GRAPHICS_STATE.finditer(data, position, text_object.start()):
+                if operator.group() == b"cm":
+                    # The six operands are the last numbers before the operator
+                    operands = data[max(operator.start() - 128, 0) : operator.start()].split()[-6:]
+                    ctm = _multiply([float(value) for value in operands], ctm)
+                elif operator.group() == b"q":
+                    ctm_stack.append(ctm)
+                elif ctm_stack:
+                    ctm = ctm_stack.pop()
+            position = text_object.end()
+
+            tm = tlm = identity
+            operands = []
+            array = None
+            for match in _TOKEN.finditer(text_object.group(1)):
+                token = match.group()
+                first = token[:1]
+                if token == b"[":
+                    array = []
+                elif token == b"]":
+                    operands.append(array or [])
+                    array = None
+                elif first == b"<" and token not in (b"<<", b">>"):
+                    value = bytes.fromhex(token[1:-1].decode())
+                    (array if array is not None else operands).append(value)
+                elif first == b"(":
+                    value = _unescape_literal(token[1:-1])
+                    (array if array is not None else operands).append(value)
+                elif first == b"/":
+                    operands.append(token.decode("latin-1"))
+                elif first in b"+-.0123456789":
+                    try:
+                        value = float(token)
+                    except ValueError:
+                        operands = []
+                        continue
+                    (array if array is not None else operands).append(value)
+                else:
+                    operator = token
+                    if operator == b"Td" and len(operands) >= 2:
+                        move(operands[-2], operands[-1])
+                    elif operator == b"TD" and len(operands) >= 2:
+                        leading = -operands[-1]
+                        move(operands[-2], operands[-1])
+                    elif operator == b"Tm" and len(operands) >= 6:
+                        tm = tlm = [float(value) for value in operands[-6:]]
+                    elif operator == b"T*":
+                        move(0.0, -leading)
+                    elif operator == b"TL" and operands:
+                        leading = operands[-1]
+                    elif operator == b"Tf" and len(operands) >= 2:
+                        decoder = self._decoder(fonts, operands[-2])
+                    elif operator == b"Tj" and operands:
+                        show(operands[-1])
+                    elif operator == b"TJ" and operands:
+                        show(b"".join(item for item in operands[-1] if isinstance(item, bytes)))
+                    elif operator in (b"'", b'"') and operands:
+                        move(0.0, -leading)
+                        show(operands[-1])
+                    operands = []
+
+        if line:
+            lines.append("".join(line))
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+EXTRACTORS = {
+    PypdfTextExtractor.name: PypdfTextExtractor,
+    ContentStreamTextExtractor.name: ContentStreamTextExtractor,
+}
+
+
+def check_backend(backend: str) -> str:
+    """
+    Returns the backend name if it is known.
+
+    Raises:
+        ValueError: If it is not one of TEXT_BACKENDS.
+    """
+    if backend not in TEXT_BACKENDS:
+        raise ValueError(
+            f"Unknown text backend {backend!r}. Available backends: {', '.join(TEXT_BACKENDS)}."
+        )
+    return backend
@@ -0,0 +1,74 @@
+"""
+Startup helpers: deferred imports of the heavy dependencies and the explicit locale setup.
+
+Importing pandas, numpy, pypdf and openpyxl takes most of the application's start time, so modules
+bind them with lazy_import and each one is only loaded on first attribute access.
+"""
+import importlib.util
+import locale
+import sys
+
+from types import ModuleType
+from typing import Optional
+
+# Spanish LC_TIME locale names, tried in order: Windows, then POSIX variants.
+SPANISH_LOCALES = ("es", "es_ES.UTF-8", "es_AR.UTF-8", "es_ES", "Spanish_Spain.1252")
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns a module that is only executed the first time one of its attributes is accessed.
+
+    Only use it for top-level packages; submodules are reached through attributes, e.g.
+    openpyxl.worksheet.table.Table.
+
+    Args:
+        name (str): Name of the module, e.g. "pandas".
+
+    Returns:
+        ModuleType: The module, registered in sys.modules so later imports share it.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def preload(*names: str) -> None:
+    """
+    Executes lazily imported modules now. Call it before several threads may use one for the first time:
+    LazyLoader is not thread-safe before Python 3.12.
+
+    Args:
+        *names (str): Names of the modules, e.g. "openpyxl".
+    """
+    for name in names:
+        # Any attribute access executes a lazy module
+        importlib.import_module(name).__dict__
+
+
+def init_locale(names: tuple[str, ...] = SPANISH_LOCALES) -> Optional[str]:
+    """
+    Sets the Spanish time locale (month and day names). Called once by the entry points instead of
+    at import time, since not every machine has a Spanish locale installed.
+
+    Args:
+        names (tuple[str, ...], optional): Locale names to try, in order. Defaults to SPANISH_LOCALES.
+
+    Returns:
+        Optional[str]: The locale that was set, or None if none is available (the default is kept).
+    """
+    for name in names:
+        try:
+            return locale.setlocale(locale.LC_TIME, name)
+        except locale.Error:
+            continue
+    return None
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+from src.startup import lazy_import
+from src.instrumentation import stage
+from src.excel_generation.functions.id_index import IdIndex
+from src.excel_generation.functions.table_batch import TableBatch
+from src.storage.history import SegmentHistory, segment_rows
+
+if TYPE_CHECKING:
+    from src.pdf_processing.ASFT_Data import ASFT_Data
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+SHEETS = ("Mediciones", "Información")
+
+
+class DuplicateMeasurementError(Exception):
+    """Raised when a measurement id, or its pdf content, is already stored."""
+
+
+class StorageBackend(ABC):
+    """
+    Destination of the "Mediciones" and "Información" tables built for each ASFT measurement.
+
+    Measurements are queued with `add` and written together by `commit`, as one table per sheet
+    assembled from every queued measurement (see TableBatch). Every backend keeps an IdIndex
+    of the measurement ids and pdf content hashes it holds, so duplicates are rejected without reading
+    the stored tables.
+
+    When `history` is set, every commit also adds the committed runs to that SegmentHistory, so
+    historical queries never re-read the stored tables.
+    """
+
+    # Where the backend stores its data: a workbook, database file or dataset directory
+    location: Path
+
+    history: Optional[SegmentHistory] = None
+
+    def __init__(self) -> None:
+        self.id_index: IdIndex = self._load_index()
+        self._pending = TableBatch()
+        self._pending_hashes: dict[str, str] = {}
+
+    @abstractmethod
+    def _load_index(self) -> IdIndex:
+        """Returns the ids and content hashes already stored."""
+
+    @abstractmethod
+    def _write(self, tables: dict[str, pd.DataFrame], hashes: dict[str, str]) -> None:
+        """Appends the tables (keyed by sheet name) and the content hashes of their pdf files."""
+
+    @abstractmethod
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        """Returns every stored row, as one DataFrame per sheet name."""
+
+    def check_new(self, id_1: str, digest: Optional[str] = None) -> None:
+        """
+        Raises DuplicateMeasurementError if the id, or the pdf content hash, is already stored or queued.
+        """
+        if id_1 in self.id_index:
+            raise DuplicateMeasurementError("El id ya se encuentra en la base de datos.")
+        existing_id = self.id_index.id_for_hash(digest) if digest else None
+        if existing_id is not None:
+            raise DuplicateMeasurementError(
+                f"El archivo ya se encuentra en la base de datos con el id {existing_id}."
+            )
+
+    def add(self, data: ASFT_Data, digest: Optional[str] = None) -> None:
+        """
+        Queues the rows of one measurement, whose runway length and starting position are set, to be
+        written on the next commit.
+        """
+        id_1 = data.id_1
+        self.check_new(id_1, digest)
+        self._pending.append(data)
+        self.id_index.add(id_1, digest)
+        if digest is not None:
+            self._pending_hashes[digest] = id_1
+
+    def add_to_heat_map(self, data: ASFT_Data) -> None:
+        """
+        Adds a measurement to the (chainage × lane) heat map of its campaign, for backends that store
+        one; only ExcelBackend does, the SQLite and Parquet stores ignore it. Called with every
+        measurement queued with `add`.
+        """
+
+    def commit(self) -> None:
+        """
+        Writes every queued measurement. If writing fails, nothing is written and the queue is discarded.
+        """
+        if not len(self._pending):
+            return
+        with stage("assemble_tables", self.location.name, files=len(self._pending)) as counters:
+            tables = self._pending.tables()
+            counters["rows"] = len(tables["Mediciones"])
+        hashes = self._pending_hashes
+        self._pending = TableBatch()
+        self._pending_hashes = {}
+        try:
+            with stage(
+                "commit",
+                self.location.name,
+                backend=type(self).__name__,
+                files=len(tables["Información"]),
+                rows=len(tables["Mediciones"]),
+            ) as counters:
+                self._write(tables, hashes)
+                if self.location.is_file():
+                    counters["bytes"] = self.location.stat().st_size
+        except Exception:
+            self.id_index = self._load_index()
+            raise
+
+        if self.history is not None:
+            try:
+                with stage("history", self.location.name, files=len(tables["Información"])):
+                    self.history.write(segment_rows(tables["Mediciones"], tables["Información"]))
+            except Exception as e:
+                # The store holds the runs: the history can be completed later with add_tables
+                logger.warning(
+                    "No se pudo actualizar el historial %s: %s", self.history.file_path, e
+                )
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "StorageBackend":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+from src.startup import lazy_import
+from src.excel_generation.functions.excel_operations import append_dataframes_to_excel
+from src.excel_generation.functions.id_index import IdIndex
+from src.pdf_processing.heat_map import HeatMap
+from src.storage.base import SHEETS, StorageBackend
+from src.storage.parquet_backend import ParquetBackend
+
+if TYPE_CHECKING:
+    from src.pdf_processing.ASFT_Data import ASFT_Data
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+HEAT_MAP_SHEET = "Mapa de calor"
+
+
+def open_columnar(
+    columnar_directory: Optional[Union[str, Path, ParquetBackend]]
+) -> Optional[ParquetBackend]:
+    """
+    Returns the Parquet store of a columnar directory, or the store itself if one is given.
+    """
+    if columnar_directory is None or isinstance(columnar_directory, ParquetBackend):
+        return columnar_directory
+    return ParquetBackend(columnar_directory)
+
+
+class ExcelBackend(StorageBackend):
+    """
+    Stores the tables as sheets of an Excel workbook, with its ids indexed in a sidecar file.
+
+    The workbook also holds the campaign's heat map (see HeatMap.to_frame) in the "Mapa de calor"
+    sheet, rewritten on every commit; the grid it is computed from is kept in another sidecar file, one
+    per runway length. The sheet shows the map of the runway length last committed.
+
+    With a `columnar_directory`, every commit also appends the runs to the Parquet store there (see
+    ParquetBackend.append_tables), which Power BI loads much faster than the workbook. Workbooks
+    committed from several threads must share the store: pass them the same ParquetBackend instead.
+    """
+
+    def __init__(
+        self,
+        excel_file: Union[str, Path],
+        columnar_directory: Optional[Union[str, Path, ParquetBackend]] = None,
+    ) -> None:
+        self.excel_file = self.location = Path(excel_file)
+        self.columnar: Optional[ParquetBackend] = open_columnar(columnar_directory)
+        self._pending_heat_map: Optional[HeatMap] = None
+        super().__init__()
+
+    def add_to_heat_map(self, data: ASFT_Data) -> None:
+        if self._pending_heat_map is None:
+            self._pending_heat_map = HeatMap(data.runway_length)
+        try:
+            self._pending_heat_map.add(data)
+        except ValueError as e:
+            logger.warning("%s no se agrega al mapa de calor: %s", data, e)
+
+    def _load_index(self) -> IdIndex:
+        return IdIndex.load(self.excel_file)
+
+    def _write(self, tables: dict[str, pd.DataFrame], hashes: dict[str, str]) -> None:
+        heat_map, self._pending_heat_map = self._pending_heat_map, None
+        replace = {}
+        if heat_map is not None:
+            sidecar_path = HeatMap.sidecar_path(self.excel_file, heat_map.runway_length)
+            stored = HeatMap.load(sidecar_path)
+            if stored is not None:
+                stored.merge(heat_map)
+                heat_map = stored
+            others = [
+                path.name
+                for path in self.excel_file.parent.glob(f"{self.excel_file.name}.heatmap-*.npz")
+                if path != sidecar_path
+            ]
+            if others:
+                # The sheet holds one map: the others are kept in their files
+                logger.warning(
+                    "El mapa de calor de %s muestra la pista de %d m; los de otras longitudes se "
+                    "conservan en %s",
+                    self.excel_file.name,
+                    heat_map.runway_length,
+                    ", ".join(sorted(others)),
+                )
+            campaign = tables["Información"].iloc[0]
+            replace[HEAT_MAP_SHEET] = heat_map.to_frame(
+                iata=campaign["iata"], pista=campaign["pista"], fecha=campaign["fecha"]
+            )
+
+        # The columnar copy goes first: if it fails, the runs aren't stored anywhere and are retried
+        # on the next run, while runs it already holds are left out if the workbook fails instead
+        if self.columnar is not None:
+            self.columnar.append_tables(tables)
+        append_dataframes_to_excel(tables, self.excel_file, replace)
+        self.id_index.save(self.excel_file)
+        if heat_map is not None:
+            try:
+                heat_map.save(sidecar_path)
+            except OSError as e:
+                # The runs are stored: failing the commit would only make them duplicates on a retry
+                logger.warning(
+                    "No se pudo guardar el mapa de calor %s, le faltarán estas mediciones: %s",
+                    sidecar_path.name,
+                    e,
+                )
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        if not self.excel_file.exists():
+            return {sheet: pd.DataFrame() for sheet in SHEETS}
+        return pd.read_excel(self.excel_file, sheet_name=list(SHEETS))
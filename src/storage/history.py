@@ -0,0 +1,248 @@
+"""
+Historical index of every ingested run, per runway segment, to compare a runway's friction across
+campaigns without re-reading the stored tables.
+
+Each run is summarized per segment of SEGMENT_LENGTH meters of chainage: its mean friction, mean 100 m
+friction average and worst criticality there. Rows live in a small SQLite file keyed by (iata, runway,
+absolute side, separation, segment, date, time, id_1), so the time series of a segment is one index
+range scan. Storage backends append to it on every commit (see StorageBackend.history), so it is
+never rebuilt to answer a query.
+
+    >>> SegmentHistory("out/asft_historial.sqlite").query("AEP", "13-31", "L", "3m", chainage=450)
+            fecha   horario  id_1  tramo  fricción  prom. fricción 100m criticidad  muestras
+    0  2024-02-28  10:15:02   ...    400      0.71                 0.70      verde        10
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import sqlite3
+
+from pathlib import Path
+from typing import Optional, Union
+from src.startup import lazy_import
+from src.pdf_processing.criticality import COLOR_LABELS, WHITE
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE_NAME = "asft_historial.sqlite"
+
+SEGMENT_LENGTH = 100
+
+KEY_COLUMNS = ["iata", "pista", "lado absoluto", "separación", "tramo", "fecha", "horario", "id_1"]
+VALUE_COLUMNS = ["fricción", "prom. fricción 100m", "criticidad", "muestras"]
+COLUMNS = KEY_COLUMNS + VALUE_COLUMNS
+
+
+def _quoted(columns: list[str]) -> str:
+    return ", ".join(f'"{column}"' for column in columns)
+
+
+def _iso_date(value) -> str:
+    """
+    Returns a date as YYYY-MM-DD, whether it is a date, a datetime (e.g. a Timestamp read from a
+    workbook) or text.
+    """
+    return pd.Timestamp(value).date().isoformat()
+
+
+def _iso_time(value) -> str:
+    """
+    Returns a time of day as HH:MM:SS, whether it is a time, a datetime or text.
+    """
+    if isinstance(value, datetime.datetime):
+        value = value.time()
+    elif not isinstance(value, datetime.time):
+        value = datetime.time.fromisoformat(str(value))
+    return value.strftime("%H:%M:%S")
+
+
+def segment_rows(measurements: pd.DataFrame, information: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarizes the "Mediciones" rows of some runs per segment of SEGMENT_LENGTH meters.
+
+    Only rows measured on the runway (distance above 0) are summarized. The criticality of a segment is
+    the worst color of its rows, or white (blanco) when none was classified.
+
+    Args:
+        measurements (pd.DataFrame): "Mediciones" rows, as built by create_measurement_file.
+        information (pd.DataFrame): "Información" rows of the same runs.
+
+    Returns:
+        pd.DataFrame: One row per run and segment, with the COLUMNS of the history.
+    """
+    measured = measurements[measurements["distancia"] > 0]
+    codes = pd.Categorical(measured["criticidad"], categories=COLOR_LABELS).codes.astype(np.int16)
+    # White means no data: rank it after every color so the minimum is the worst color measured
+    codes[codes <= WHITE] = len(COLOR_LABELS)
+    segments = pd.DataFrame(
+        {
+            "id_1": measured["id_1"].to_numpy(),
+            "tramo": (measured["progresiva"].to_numpy() // SEGMENT_LENGTH) * SEGMENT_LENGTH,
+            "fricción": measured["fricción"].to_numpy(),
+            "prom. fricción 100m": measured["prom. fricción 100m"].to_numpy(),
+            "criticidad": codes,
+        }
+    )
+    segments = (
+        segments.groupby(["id_1", "tramo"], sort=False, observed=True)
+        .agg(
+            **{
+                "fricción": ("fricción", "mean"),
+                "prom. fricción 100m": ("prom. fricción 100m", "mean"),
+                "criticidad": ("criticidad", "min"),
+                "muestras": ("fricción", "size"),
+            }
+        )
+        .reset_index()
+    )
+    codes = segments["criticidad"].to_numpy()
+    codes[codes == len(COLOR_LABELS)] = WHITE
+    segments["criticidad"] = np.asarray(COLOR_LABELS, dtype=object)[codes]
+    segments[["fricción", "prom. fricción 100m"]] = segments[
+        ["fricción", "prom. fricción 100m"]
+    ].round(2)
+
+    keys = information[["id_1", "iata", "pista", "lado absoluto", "separación", "fecha", "horario"]]
+    return segments.merge(keys, on="id_1", how="inner")[COLUMNS]
+
+
+class SegmentHistory:
+    """
+    Per-segment summaries of every run ingested into a store, indexed for time series queries.
+
+    Connections can't be shared between threads: open one SegmentHistory per thread. Concurrent writers
+    of the same file wait for each other.
+
+    Args:
+        file_path (Union[str, Path]): The SQLite file. It is created if it doesn't exist.
+    """
+
+    def __init__(self, file_path: Union[str, Path]) -> None:
+        self.file_path = Path(file_path)
+        self.connection = sqlite3.connect(self.file_path, timeout=30)
+        with self.connection:
+            # Without a rowid the table is stored in key order, so a segment's runs are contiguous
+            self.connection.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS tramos (
+                    iata TEXT, pista TEXT, "lado absoluto" TEXT, "separación" TEXT, tramo INTEGER,
+                    fecha TEXT, horario TEXT, id_1 TEXT, "fricción" REAL,
+                    "prom. fricción 100m" REAL, criticidad TEXT, muestras INTEGER,
+                    PRIMARY KEY ({_quoted(KEY_COLUMNS)})
+                ) WITHOUT ROWID
+                """
+            )
+
+    @staticmethod
+    def sidecar_path(location: Union[str, Path]) -> Path:
+        """
+        Path of the history of a database file or dataset directory, next to it.
+        """
+        location = Path(location)
+        return location.with_name(f"{location.name}.historial.sqlite")
+
+    def write(self, rows: pd.DataFrame) -> None:
+        """
+        Stores the segment rows of some runs (see segment_rows), replacing those already stored for the
+        same runs and segments. Rows with a missing key (e.g. a run without a date) are left out.
+        """
+        missing = rows[KEY_COLUMNS].isna().any(axis=1)
+        if missing.any():
+            logger.warning(
+                "%d tramos sin fecha, horario o configuración no se agregan al historial: %s",
+                missing.sum(),
+                ", ".join(map(str, rows.loc[missing, "id_1"].unique())),
+            )
+            rows = rows[~missing]
+        if rows.empty:
+            return
+        rows = rows.astype({"tramo": "int64", "muestras": "int64"})
+        rows["fecha"] = rows["fecha"].map(_iso_date)
+        rows["horario"] = rows["horario"].map(_iso_time)
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO tramos ({_quoted(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows[COLUMNS].itertuples(index=False, name=None),
+            )
+
+    def add_tables(self, tables: dict[str, pd.DataFrame]) -> None:
+        """
+        Stores the runs of some "Mediciones" and "Información" tables, e.g. those returned by
+        StorageBackend.read_tables to index a store ingested before the history existed.
+        """
+        if tables["Información"].empty:
+            return
+        self.write(segment_rows(tables["Mediciones"], tables["Información"]))
+
+    def query(
+        self,
+        iata: str,
+        runway: str,
+        side: str,
+        separation: str,
+        chainage: Optional[int] = None,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the friction and criticality time series of a lane, or of one of its segments.
+
+        Args:
+            iata (str): Airport code, e.g. "AEP".
+            runway (str): Runway designation, e.g. "13-31".
+            side (str): Absolute side, "L" or "R".
+            separation (str): Separation from the runway axis, e.g. "3m" or "borde".
+            chainage (int, optional): A chainage of the segment, in meters. Defaults to every segment.
+            start (datetime.date, optional): First date included.
+            end (datetime.date, optional): Last date included.
+
+        Returns:
+            pd.DataFrame: fecha, horario, id_1, tramo and the segment's values, sorted by segment,
+            then date and time.
+        """
+        conditions = ['iata = ?', 'pista = ?', '"lado absoluto" = ?', '"separación" = ?']
+        parameters: list = [iata, runway, side, separation]
+        if chainage is not None:
+            conditions.append("tramo = ?")
+            parameters.append(int(chainage) // SEGMENT_LENGTH * SEGMENT_LENGTH)
+        if start is not None:
+            conditions.append("fecha >= ?")
+            parameters.append(start.isoformat())
+        if end is not None:
+            conditions.append("fecha <= ?")
+            parameters.append(end.isoformat())
+
+        columns = ["fecha", "horario", "id_1", "tramo", *VALUE_COLUMNS]
+        rows = self.connection.execute(
+            f"SELECT {_quoted(columns)} FROM tramos WHERE {' AND '.join(conditions)} "
+            "ORDER BY tramo, fecha, horario, id_1",
+            parameters,
+        ).fetchall()
+        history = pd.DataFrame(rows, columns=columns)
+        history["fecha"] = history["fecha"].map(datetime.date.fromisoformat)
+        history["horario"] = history["horario"].map(datetime.time.fromisoformat)
+        return history
+
+    def lanes(self, iata: str, runway: str) -> list[tuple[str, str]]:
+        """
+        Returns the (absolute side, separation) of every lane of a runway with stored runs.
+        """
+        return self.connection.execute(
+            'SELECT DISTINCT "lado absoluto", "separación" FROM tramos '
+            "WHERE iata = ? AND pista = ? ORDER BY 1, 2",
+            (iata, runway),
+        ).fetchall()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "SegmentHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
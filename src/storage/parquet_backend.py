@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+import uuid
+
+from pathlib import Path
+from typing import Optional, Union
+from src.startup import lazy_import
+from src.excel_generation.functions.id_index import IdIndex
+from src.storage.base import SHEETS, StorageBackend
+
+pd = lazy_import("pandas")
+
+# Hive partitions of both tables: a campaign only adds files under its airport, runway and year (año,
+# the year of its date), so Power BI's incremental refresh can skip the other years
+PARTITION_COLUMNS = ["iata", "pista", "año"]
+PARTITION_TYPES = {"iata": "string", "pista": "string", "año": "int64"}
+
+# Arrow types of the stored columns, by sheet: every part file has this schema, whatever the values of
+# a commit. Tables read back from a workbook hold whole numbers as int and empty text columns as float,
+# so they are converted before writing. id_1 and criticidad are dictionary-encoded.
+COLUMN_TYPES = {
+    "Mediciones": {
+        "id_1": "category",
+        "progresiva": "int64",
+        "distancia": "int64",
+        "fricción": "float64",
+        "velocidad": "int64",
+        "prom. fricción 100m": "float64",
+        "criticidad": "category",
+    },
+    "Información": {
+        "id_1": "category",
+        "id_2": "string",
+        "fecha": "date",
+        "horario": "time",
+        "iata": "string",
+        "cabecera": "string",
+        "lado relativo": "string",
+        "lado absoluto": "string",
+        "separación": "string",
+        "pista": "string",
+        "velocidad promedio": "int64",
+        "fric_A": "float64",
+        "fric_B": "float64",
+        "fric_C": "float64",
+        "fric_max": "float64",
+        "fric_min": "float64",
+        "fric_prom": "float64",
+        "longitud de pista": "int64",
+        "inicio de medición": "int64",
+        "equipo": "string",
+        "piloto": "string",
+        "nivel de hielo": "int64",
+        "presión de neumático": "float64",
+        "película de agua": "string",
+        "distancia sistema": "float64",
+        "operador": "string",
+        "temperatura ambiente": "float64",
+        "temperatura de pista": "float64",
+        "humedad": "float64",
+        "observaciones": "string",
+    },
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "The Parquet storage backend requires pyarrow. Install it with `pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def _arrow_type(pyarrow, dtype: str):
+    if dtype == "category":
+        return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    if dtype == "date":
+        return pyarrow.date32()
+    if dtype == "time":
+        return pyarrow.time64("us")
+    return pyarrow.from_numpy_dtype(dtype) if dtype != "string" else pyarrow.string()
+
+
+def _date(value) -> Optional[datetime.date]:
+    """
+    Returns the date of a "fecha" value, which read_excel returns as a Timestamp.
+    """
+    if pd.isna(value):
+        return None
+    return pd.Timestamp(value).date()
+
+
+def _time(value) -> Optional[datetime.time]:
+    """
+    Returns the time of a "horario" value, which may be read back as a datetime or as text.
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime.time):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.time()
+    return datetime.time.fromisoformat(str(value))
+
+
+def _typed(sheet: str, table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the columns of a table to the values of their COLUMN_TYPES.
+    """
+    table = table.copy()
+    for column, dtype in COLUMN_TYPES[sheet].items():
+        if column not in table:
+            continue
+        values = table[column]
+        if dtype in ("int64", "float64"):
+            table[column] = pd.to_numeric(values, errors="coerce").astype(
+                "Int64" if dtype == "int64" else dtype
+            )
+        elif dtype == "string":
+            table[column] = values.astype("string")
+        elif dtype == "category":
+            table[column] = values.astype(str).astype("category")
+        elif dtype == "date":
+            table[column] = values.map(_date)
+        elif dtype == "time":
+            table[column] = values.map(_time)
+    return table
+
+
+def _commit_of(part_file: Path) -> str:
+    """
+    Returns the commit a part file was written by: the uuid of its "part-<uuid>-<i>.parquet" name.
+    """
+    return part_file.name.split("-")[1]
+
+
+class ParquetBackend(StorageBackend):
+    """
+    Stores each table as a Parquet dataset partitioned by iata, runway (pista) and year (año), with the
+    column types of COLUMN_TYPES. Every commit adds new part files, so stored data is never rewritten. Power BI
+    loads the datasets much faster than a workbook, and they have no row limit. Requires pyarrow.
+
+    A commit writes "Mediciones" first and "Información" last, and removes its part files if writing
+    fails. The ids stored are those of "Información", and only the "Mediciones" part files of commits
+    with an "Información" part file are read, so a commit still being written, or interrupted, is never
+    read. Commits of one instance are serialized, so threads writing the same store (e.g. the
+    columnar copy of several workbooks) must share one instance.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        _import_pyarrow()
+        self.directory = self.location = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        super().__init__()
+
+    @property
+    def _hashes_file(self) -> Path:
+        return self.directory / "archivos.json"
+
+    def _dataset(self, sheet: str) -> Path:
+        return self.directory / sheet
+
+    def _part_files(self, sheet: str, commit: str = "*") -> list[Path]:
+        if not self._dataset(sheet).exists():
+            return []
+        return list(self._dataset(sheet).rglob(f"part-{commit}-*.parquet"))
+
+    def _remove_commit(self, commit: str) -> None:
+        for sheet in SHEETS:
+            for part_file in self._part_files(sheet, commit):
+                part_file.unlink(missing_ok=True)
+
+    def _committed_part_files(self, sheet: str) -> list[Path]:
+        """
+        Returns the part files of a sheet written by commits that wrote their "Información".
+        """
+        committed = {_commit_of(part_file) for part_file in self._part_files("Información")}
+        return [
+            part_file for part_file in self._part_files(sheet) if _commit_of(part_file) in committed
+        ]
+
+    def _load_index(self) -> IdIndex:
+        ids = set()
+        if self._part_files("Información"):
+            ids = set(
+                pd.read_parquet(self._dataset("Información"), columns=["id_1"])["id_1"]
+            )
+        hashes = {}
+        if self._hashes_file.exists():
+            hashes = json.loads(self._hashes_file.read_text(encoding="utf-8"))
+        return IdIndex(ids, hashes)
+
+    def _schema(self, sheet: str, columns):
+        pyarrow = _import_pyarrow()
+        types = {**PARTITION_TYPES, **COLUMN_TYPES[sheet]}
+        return pyarrow.schema(
+            [(column, _arrow_type(pyarrow, types.get(column, "string"))) for column in columns]
+        )
+
+    def _write(self, tables: dict[str, pd.DataFrame], hashes: dict[str, str]) -> None:
+        pyarrow = _import_pyarrow()
+
+        information = _typed("Información", tables["Información"])
+        information["año"] = information["fecha"].map(lambda date: date.year)
+        partitions = information[["id_1", *PARTITION_COLUMNS]].astype({"id_1": str})
+        measurements = _typed(
+            "Mediciones",
+            tables["Mediciones"]
+            .astype({"id_1": str})
+            .merge(partitions, on="id_1", how="left"),
+        )
+
+        commit = uuid.uuid4().hex
+        try:
+            for sheet, table in (("Mediciones", measurements), ("Información", information)):
+                pyarrow.parquet.write_to_dataset(
+                    pyarrow.Table.from_pandas(
+                        table, schema=self._schema(sheet, table.columns), preserve_index=False
+                    ),
+                    self._dataset(sheet),
+                    partition_cols=PARTITION_COLUMNS,
+                    basename_template=f"part-{commit}-{{i}}.parquet",
+                )
+
+            self._save_hashes()
+        except BaseException:
+            self._remove_commit(commit)
+            raise
+
+    def _save_hashes(self) -> None:
+        """
+        Adds the content hashes of the index to the hashes file, keeping those written meanwhile by
+        another instance.
+        """
+        stored_hashes = {}
+        if self._hashes_file.exists():
+            stored_hashes = json.loads(self._hashes_file.read_text(encoding="utf-8"))
+        stored_hashes.update(self.id_index.hashes)
+        # Write to a temporary file first so a crash never leaves a half-written file behind
+        handle, temp_path = tempfile.mkstemp(
+            suffix=".tmp", prefix=f"{self._hashes_file.name}.", dir=self.directory
+        )
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as file:
+                json.dump(stored_hashes, file)
+            os.replace(temp_path, self._hashes_file)
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+    def commit(self) -> None:
+        with self._lock:
+            super().commit()
+
+    def append_tables(self, tables: dict[str, pd.DataFrame]) -> int:
+        """
+        Appends the runs of tables read from another store (e.g. ExcelBackend.read_tables) that aren't
+        stored yet, in one commit.
+
+        Args:
+            tables (dict[str, pd.DataFrame]): The "Mediciones" and "Información" tables of some runs.
+
+        Returns:
+            int: Number of runs appended.
+        """
+        with self._lock:
+            return self._append_tables(tables)
+
+    def _append_tables(self, tables: dict[str, pd.DataFrame]) -> int:
+        information = tables["Información"]
+        if information.empty:
+            return 0
+        new = information[[id_1 not in self.id_index for id_1 in information["id_1"].astype(str)]]
+        if new.empty:
+            return 0
+        measurements = tables["Mediciones"]
+        measurements = measurements[measurements["id_1"].astype(str).isin(new["id_1"].astype(str))]
+
+        for id_1 in new["id_1"].astype(str):
+            self.id_index.add(id_1)
+        try:
+            self._write({"Mediciones": measurements, "Información": new}, {})
+        except Exception:
+            self.id_index = self._load_index()
+            raise
+        return len(new)
+
+    def _column_order(self, sheet: str, columns) -> list[str]:
+        """
+        Partition columns are read back last; restore the column order the tables were written with.
+        """
+        pyarrow = _import_pyarrow()
+        part_file = self._part_files(sheet)[0]
+        metadata = pyarrow.parquet.read_schema(part_file).pandas_metadata or {}
+        written = [column["name"] for column in metadata.get("columns", [])]
+        return [column for column in written if column in columns] + [
+            column for column in columns if column not in written
+        ]
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        pyarrow = _import_pyarrow()
+        tables = {}
+        for sheet in SHEETS:
+            part_files = self._committed_part_files(sheet)
+            if not part_files:
+                tables[sheet] = pd.DataFrame()
+                continue
+            dataset = pyarrow.dataset.dataset(
+                [str(part_file) for part_file in part_files],
+                format="parquet",
+                partitioning="hive",
+                partition_base_dir=str(self._dataset(sheet)),
+            )
+            table = dataset.to_table().to_pandas()
+            # The year only partitions the datasets, and "Mediciones" holds the airport and runway
+            # through "Información"
+            derived = PARTITION_COLUMNS if sheet == "Mediciones" else ["año"]
+            table = table.drop(columns=derived)
+            for column in PARTITION_COLUMNS:
+                if column in table:
+                    table[column] = table[column].astype(str)
+            tables[sheet] = table[self._column_order(sheet, table.columns)]
+        return tables
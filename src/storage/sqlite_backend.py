@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import datetime
+import sqlite3
+
+from pathlib import Path
+from typing import Union
+from src.startup import lazy_import
+from src.excel_generation.functions.id_index import IdIndex
+from src.storage.base import StorageBackend
+
+pd = lazy_import("pandas")
+
+TABLES = {"Mediciones": "mediciones", "Información": "informacion"}
+
+INDEXES = {
+    "informacion": ["id_1", "id_2", "iata", "pista", "fecha"],
+    "mediciones": ["id_1"],
+}
+
+
+def _to_sql_values(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stores dates and times as ISO 8601 text, which sorts and compares correctly in SQLite. Only object
+    columns holding them (fecha, horario) are converted; the others are passed through as they are.
+    """
+    converted = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            continue
+        present = values.dropna()
+        if len(present) and isinstance(present.iloc[0], (datetime.date, datetime.time)):
+            converted[column] = values.map(
+                lambda value: value.isoformat() if value is not None else None
+            )
+    return df.assign(**converted) if converted else df
+
+
+def _sql_type(values: pd.Series) -> str:
+    """
+    Returns the SQLite type of a column, as DataFrame.to_sql declares it.
+    """
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(values):
+        return "REAL"
+    return "TEXT"
+
+
+def _rows(df: pd.DataFrame):
+    """
+    Yields the rows of a table as tuples of Python values, with None for missing values.
+    """
+    values = df.astype(object)
+    return values.where(values.notna(), None).itertuples(index=False, name=None)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Stores the tables in an SQLite database, indexed on id_1, id_2, iata, runway and date.
+    Each commit is a single transaction: if writing fails, neither table nor the content hashes change.
+    """
+
+    def __init__(self, database_file: Union[str, Path]) -> None:
+        self.database_file = self.location = Path(database_file)
+        self.connection = sqlite3.connect(self.database_file)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS archivos (content_hash TEXT PRIMARY KEY, id_1 TEXT)"
+        )
+        super().__init__()
+
+    def _table_exists(self, table: str) -> bool:
+        return (
+            self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            is not None
+        )
+
+    def _load_index(self) -> IdIndex:
+        ids = set()
+        if self._table_exists("informacion"):
+            ids = {row[0] for row in self.connection.execute("SELECT id_1 FROM informacion")}
+        hashes = dict(self.connection.execute("SELECT content_hash, id_1 FROM archivos"))
+        return IdIndex(ids, hashes)
+
+    def _columns(self, table: str) -> list[str]:
+        return [row[1] for row in self.connection.execute(f'PRAGMA table_info("{table}")')]
+
+    def _insert(self, table: str, df: pd.DataFrame) -> None:
+        """
+        Inserts the rows of a table, creating it, or the columns it lacks, first.
+        """
+        df = _to_sql_values(df)
+        stored = self._columns(table)
+        if not stored:
+            columns = ", ".join(f'"{column}" {_sql_type(df[column])}' for column in df.columns)
+            self.connection.execute(f'CREATE TABLE "{table}" ({columns})')
+        for column in df.columns:
+            if stored and column not in stored:
+                self.connection.execute(
+                    f'ALTER TABLE "{table}" ADD COLUMN "{column}" {_sql_type(df[column])}'
+                )
+        for column in INDEXES[table]:
+            self.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS "ix_{table}_{column}" ON "{table}" ("{column}")'
+            )
+        columns = ", ".join(f'"{column}"' for column in df.columns)
+        self.connection.executemany(
+            f'INSERT INTO "{table}" ({columns}) VALUES ({", ".join("?" * len(df.columns))})',
+            _rows(df),
+        )
+
+    def _write(self, tables: dict[str, pd.DataFrame], hashes: dict[str, str]) -> None:
+        # DataFrame.to_sql commits each table by itself, so both are inserted here in one transaction
+        self.connection.execute("BEGIN")
+        try:
+            for sheet, table in TABLES.items():
+                self._insert(table, tables[sheet])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO archivos (content_hash, id_1) VALUES (?, ?)",
+                hashes.items(),
+            )
+        except BaseException:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        tables = {}
+        for sheet, table in TABLES.items():
+            if not self._table_exists(table):
+                tables[sheet] = pd.DataFrame()
+                continue
+            tables[sheet] = pd.read_sql_query(f'SELECT * FROM "{table}"', self.connection)
+
+        information = tables["Información"]
+        if not information.empty:
+            information["fecha"] = information["fecha"].map(datetime.date.fromisoformat)
+            information["horario"] = information["horario"].map(datetime.time.fromisoformat)
+        return tables
+
+    def close(self) -> None:
+        self.connection.close()
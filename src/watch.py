@@ -0,0 +1,236 @@
+"""
+Watch mode: polls drop folders for new ASFT .pdf files and ingests them as they arrive.
+
+A file is ingested once it is complete: its size and modification time haven't changed for
+`settle_seconds` and it ends with a pdf trailer (%%EOF), so files still being copied from the ASFT
+device are left for a later poll. Processed files are remembered in a JSON state file with the size
+and modification time they had, so a restart only picks up files that are new or were replaced.
+
+Polling uses nothing but os.stat, so it works the same on every OS and on network shares.
+
+    python -m src.cli pdf/drop --target out --runway-length 2100 --start-0118 0 --start-1936 2100 --watch
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Union
+from src.excel_generation.excel_db import IngestionSummary, create_measurement_files
+from src.pdf_processing.pdf_management import iter_pdf_files
+from src.storage.base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE_NAME = "asft_watch_state.json"
+
+# Seconds between polls, and seconds a file must stay unchanged before it is ingested
+POLL_INTERVAL = 2.0
+SETTLE_SECONDS = 2.0
+
+# Bytes at the end of a file searched for the %%EOF marker of a complete pdf
+_TRAILER_BYTES = 1024
+
+
+def _signature(stat: os.stat_result) -> list[int]:
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _has_trailer(file_path: Path) -> bool:
+    with open(file_path, "rb") as file:
+        file.seek(max(file.seek(0, os.SEEK_END) - _TRAILER_BYTES, 0))
+        return b"%%EOF" in file.read()
+
+
+class WatchState:
+    """
+    Files already processed by watch mode, with their size, modification time and outcome, persisted
+    as JSON.
+
+    Args:
+        file_path (Union[str, Path]): The state file. It is created on the first save.
+    """
+
+    def __init__(self, file_path: Union[str, Path]) -> None:
+        self.file_path = Path(file_path)
+        self.files: dict[str, dict] = {}
+        if self.file_path.exists():
+            try:
+                self.files = json.loads(self.file_path.read_text(encoding="utf-8"))["files"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(
+                    "Estado de vigilancia ilegible (%s), se reprocesará la carpeta: %s", self.file_path, e
+                )
+
+    def is_processed(self, file_path: Path, stat: os.stat_result) -> bool:
+        entry = self.files.get(str(file_path.resolve()))
+        return entry is not None and entry["signature"] == _signature(stat)
+
+    def mark(self, file_path: Path, status: str) -> None:
+        """
+        Records a file as processed with the given status ("agregado", "omitido" or "error").
+        """
+        try:
+            signature = _signature(file_path.stat())
+        except OSError:
+            return
+        self.files[str(file_path.resolve())] = {"signature": signature, "status": status}
+
+    def save(self) -> None:
+        # Write to a temporary name first so a crash never leaves a half-written state behind
+        temp_path = self.file_path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps({"files": self.files}, indent=1), encoding="utf-8")
+        os.replace(temp_path, self.file_path)
+
+
+class FolderWatcher:
+    """
+    Finds the complete, not yet processed .pdf files of a folder, one poll at a time.
+
+    Args:
+        folder (Union[str, Path]): The drop folder.
+        state (WatchState): Processed files, shared by every watched folder.
+        settle_seconds (float, optional): Time a file's size and modification time must stay unchanged.
+            Defaults to SETTLE_SECONDS.
+        recursive (bool, optional): Whether to watch subfolders too. Defaults to False.
+        clock (Callable[[], float], optional): Monotonic clock, in seconds. Defaults to time.monotonic.
+    """
+
+    def __init__(
+        self,
+        folder: Union[str, Path],
+        state: WatchState,
+        settle_seconds: float = SETTLE_SECONDS,
+        recursive: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.folder = Path(folder)
+        self.state = state
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.clock = clock
+        # Path -> (signature, time it was first seen with that signature)
+        self._seen: dict[Path, tuple[list[int], float]] = {}
+
+    def poll(self) -> list[Path]:
+        """
+        Returns the files that became ready to ingest since the last poll, sorted by path.
+        """
+        now = self.clock()
+        ready = []
+        seen = {}
+        for file_path in iter_pdf_files(self.folder, self.recursive):
+            try:
+                stat = file_path.stat()
+            except OSError:
+                # Deleted or renamed since it was listed
+                continue
+            if self.state.is_processed(file_path, stat):
+                continue
+
+            signature = _signature(stat)
+            previous = self._seen.get(file_path)
+            since = previous[1] if previous is not None and previous[0] == signature else now
+            seen[file_path] = (signature, since)
+            if now - since < self.settle_seconds or stat.st_size == 0:
+                continue
+            try:
+                complete = _has_trailer(file_path)
+            except OSError:
+                complete = False
+            if complete:
+                ready.append(file_path)
+
+        self._seen = seen
+        return ready
+
+    def record(self, summary: IngestionSummary) -> None:
+        """
+        Marks the files of an ingestion as processed. Files that failed to parse are only retried if
+        they change; those whose rows could not be stored are left unrecorded and retried on the next
+        poll.
+        """
+        for file_path in summary.written:
+            self.state.mark(Path(file_path), "agregado")
+        for entry in summary.skipped:
+            self.state.mark(Path(entry["file"]), "omitido")
+        for entry in summary.failed:
+            if entry.get("stage") != "commit":
+                self.state.mark(Path(entry["file"]), "error")
+
+
+def watch(
+    runs: list[dict],
+    state_file: Union[str, Path],
+    interval: float = POLL_INTERVAL,
+    settle_seconds: float = SETTLE_SECONDS,
+    recursive: bool = False,
+    storage: Optional[StorageBackend] = None,
+    group_settings: Optional[Mapping[tuple, dict]] = None,
+    stop_event: Optional[threading.Event] = None,
+    on_batch: Optional[Callable[[dict, IngestionSummary], None]] = None,
+    **options,
+) -> None:
+    """
+    Polls the folder of every run and ingests its new files until `stop_event` is set.
+
+    Args:
+        runs (list[dict]): One dict per watched folder with its "folder", "target_directory" and the
+            settings of create_measurement_file (runway_length, runway_starting_position_0118, ...).
+        state_file (Union[str, Path]): JSON file remembering the processed files across restarts.
+        interval (float, optional): Seconds between polls. Defaults to POLL_INTERVAL.
+        settle_seconds (float, optional): Seconds a file must stay unchanged before it is ingested.
+            Defaults to SETTLE_SECONDS.
+        recursive (bool, optional): Whether to watch subfolders too. Defaults to False.
+        storage (StorageBackend, optional): Store receiving every measurement. By default each file goes
+            to the Excel workbook of its airport, runway and date in the run's target directory.
+        group_settings (Mapping[tuple, dict], optional): Settings of some airports and runways, over
+            the run's (see create_measurement_files).
+        stop_event (threading.Event, optional): Stops watching when set. If not given, watches until
+            interrupted.
+        on_batch (Callable[[dict, IngestionSummary], None], optional): Called with the run and the
+            summary of every group ingested.
+        **options: Other arguments of create_measurement_file (workers, cache_directory, chunk_size,
+            text_backend, columnar_directory, history_file).
+    """
+    stop_event = stop_event or threading.Event()
+    state = WatchState(state_file)
+    watchers = [
+        (run, FolderWatcher(run["folder"], state, settle_seconds, recursive)) for run in runs
+    ]
+
+    while not stop_event.is_set():
+        for run, watcher in watchers:
+            ready = watcher.poll()
+            if not ready:
+                continue
+            target_directory = Path(run["target_directory"])
+            settings = {
+                key: value for key, value in run.items() if key not in ("folder", "target_directory")
+            }
+            target_directory.mkdir(parents=True, exist_ok=True)
+            logger.info("%d archivos nuevos en %s", len(ready), watcher.folder)
+            try:
+                summaries = create_measurement_files(
+                    ready,
+                    target_directory,
+                    settings,
+                    group_settings,
+                    storage=storage,
+                    **options,
+                )
+            except Exception as e:
+                # The files stay unrecorded, so the next poll tries them again
+                logger.error("Error procesando %s, se reintentará: %s", watcher.folder, e)
+                continue
+            for summary in summaries.values():
+                watcher.record(summary)
+            state.save()
+            if on_batch is not None:
+                for summary in summaries.values():
+                    on_batch(run, summary)
+        stop_event.wait(interval)